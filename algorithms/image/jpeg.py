@@ -1,77 +1,254 @@
 # algorithms/image/jpeg.py
+import io
 import numpy as np
 from PIL import Image
-from typing import Dict, Tuple, Any, Union
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Any, Union
+from algorithms.image.jpeg_native import (DECODE_SCALES, SUBSAMPLING, BaselineJPEGDecoder, BaselineJPEGEncoder,
+                                          choose_scale, decode_baseline, encode_baseline)
 from core.base_coder import ImageCoder
+from core.parallel import bounded_as_completed, bounded_map
+
+# Lossy encoding engines: Pillow (libjpeg) or the NumPy baseline encoder
+BACKENDS = ('pil', 'native')
+
+def _encode_image(options: Dict, data: Union[str, np.ndarray, Image.Image]) -> Tuple[bytes, Dict]:
+    """Worker: encode one image with a coder built from options"""
+    return JPEGCoder(**options).encode(data)
+
+def _decode_image(options: Dict, item: Tuple[bytes, Dict]) -> Image.Image:
+    """Worker: decode one (encoded_data, metadata) pair, loading the pixels before they are sent back"""
+    image = JPEGCoder(**options).decode(*item)
+    image.load()
+    return image
+
+class LazyJPEGImage:
+    """
+    Decode handle returned by JPEGCoder.open.
+    Only the header is parsed on construction, so size and mode are known
+    cheaply; pixels are decoded by load(), optionally downscaled by 1/2, 1/4
+    or 1/8 in the DCT domain (libjpeg draft mode for Pillow, a reduced
+    inverse DCT for the native engine).
+    """
+
+    def __init__(self, encoded_data: bytes, metadata: Dict):
+        self.encoded_data = encoded_data
+        self.metadata = metadata
+        self.native = metadata.get('backend') == 'native' and metadata.get('format') == 'JPEG'
+        if self.native:
+            decoder = BaselineJPEGDecoder(encoded_data).read_header()
+            self.size = (decoder.width, decoder.height)
+            self.mode = decoder.mode
+        else:
+            with Image.open(io.BytesIO(encoded_data)) as image:
+                self.size = image.size
+                self.mode = image.mode
+
+    def load(self, scale: float = None, size: Tuple[int, int] = None) -> Image.Image:
+        """
+        Decode the pixels. size asks for at least (width, height) and picks
+        the smallest scale that still covers it; scale picks one directly.
+        """
+        if scale is not None and scale not in DECODE_SCALES:
+            raise ValueError(f"Unsupported decode scale {scale}; expected one of {DECODE_SCALES}")
+        if size is None and scale is not None and scale != 1:
+            size = (max(1, int(self.size[0] * scale)), max(1, int(self.size[1] * scale)))
+        if self.native:
+            scale = choose_scale(*self.size, size) if size is not None else 1
+            return Image.fromarray(decode_baseline(self.encoded_data, scale))
+        image = Image.open(io.BytesIO(self.encoded_data))
+        if size is not None:
+            image.draft(image.mode, size)
+        image.load()
+        return image
 
 class JPEGCoder(ImageCoder):
-    """JPEG coding implementation (both lossy and lossless)"""
+    """
+    JPEG coding implementation (both lossy and lossless).
+    backend='native' encodes and decodes lossy images with the NumPy baseline
+    engine in jpeg_native, whose stages (DCT, quantization, zigzag, Huffman
+    coding) can be inspected and reused; its output is a standard JFIF file.
+    subsampling selects the chroma subsampling ('4:4:4', '4:2:2' or '4:2:0');
+    by default the native engine keeps full-resolution chroma and Pillow
+    uses its own default.
+    target_size (bytes) or target_psnr (dB) replaces the fixed quality with
+    rate control on the native engine: quality is binary-searched over the
+    image's DCT coefficients, computed once, and the chosen value is
+    reported in the metadata.
+    """
     
     @property
     def algorithm_name(self) -> str:
         return "JPEG"
     
-    def __init__(self, quality: int = 90, lossless: bool = False):
+    def __init__(self, quality: int = 90, lossless: bool = False, backend: str = 'pil', subsampling: str = None,
+                 target_size: int = None, target_psnr: float = None):
         super().__init__()
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JPEG backend {backend}; expected one of {BACKENDS}")
+        if subsampling is not None and subsampling not in SUBSAMPLING:
+            raise ValueError(f"Unknown subsampling {subsampling}; expected one of {list(SUBSAMPLING)}")
+        if target_size is not None and target_psnr is not None:
+            raise ValueError("Specify at most one of target_size and target_psnr")
+        if (target_size is not None or target_psnr is not None) and (lossless or backend != 'native'):
+            raise ValueError("Rate control needs lossy encoding with backend='native'")
         self.quality = quality
         self.lossless = lossless
-        self.logger.info(f"Initialized JPEG Coder with quality={quality}, lossless={lossless}")
+        self.backend = backend
+        self.subsampling = subsampling
+        self.target_size = target_size
+        self.target_psnr = target_psnr
+        self.logger.info(f"Initialized JPEG Coder with quality={quality}, lossless={lossless}, backend={backend}")
     
     def encode(self, data: Union[str, np.ndarray, Image.Image]) -> Tuple[bytes, Dict]:
         """Encode image data"""
         super().encode(data)
-        if isinstance(data, str):  # File path
-            self.logger.debug(f"Loading image from path: {data}")
-            image = Image.open(data)
-        elif isinstance(data, np.ndarray):  # numpy array
-            self.logger.debug("Loading image from numpy array")
-            image = Image.fromarray(data)
-        elif isinstance(data, Image.Image): # Already a PIL Image
-            self.logger.debug("Using provided PIL Image object")
-            image = data
+        pixels = None
+        image = None
+        if isinstance(data, np.ndarray) and data.dtype == np.uint8 and data.ndim == 3 and data.shape[2] == 3:
+            # Already 8-bit RGB: no conversion, and the native engine reads the array in place
+            self.logger.debug("Using uint8 RGB numpy array as is")
+            pixels = data
+            size = (data.shape[1], data.shape[0])
+            mode = 'RGB'
+            data_size = data.nbytes
         else:
-            raise TypeError(f"Unsupported data type for encoding: {type(data)}")
-        
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
-            self.logger.debug(f"Converting image from {image.mode} to RGB")
-            image = image.convert('RGB')
+            if isinstance(data, str):  # File path
+                self.logger.debug(f"Loading image from path: {data}")
+                image = Image.open(data)
+            elif isinstance(data, np.ndarray):  # numpy array
+                self.logger.debug("Loading image from numpy array")
+                image = Image.fromarray(data)
+            elif isinstance(data, Image.Image): # Already a PIL Image
+                self.logger.debug("Using provided PIL Image object")
+                image = data
+            else:
+                raise TypeError(f"Unsupported data type for encoding: {type(data)}")
+            
+            # Convert to RGB if necessary
+            if image.mode != 'RGB':
+                self.logger.debug(f"Converting image from {image.mode} to RGB")
+                image = image.convert('RGB')
+            size = image.size
+            mode = image.mode
+            # Measured from the header fields rather than a tobytes() copy
+            data_size = image.width * image.height * len(image.getbands())
         
         # Save to bytes
-        import io
         output = io.BytesIO()
+        quality = self.quality if not self.lossless else 100
         
         if self.lossless:
             # Use PNG for lossless compression
             self.logger.info("Encoding image using lossless (PNG) format")
+            image = image if image is not None else Image.fromarray(pixels)
             image.save(output, format='PNG', optimize=True)
             format_used = 'PNG'
+        elif self.target_size is not None or self.target_psnr is not None:
+            pixels = pixels if pixels is not None else np.asarray(image)
+            encoder = BaselineJPEGEncoder(pixels, self.subsampling or '4:4:4')
+            encoded, quality = encoder.encode_to_target(self.target_size, self.target_psnr)
+            self.logger.info(f"Encoding image using the native baseline JPEG engine with rate-controlled "
+                             f"quality={quality} (target_size={self.target_size}, target_psnr={self.target_psnr})")
+            if self.target_size is not None and len(encoded) > self.target_size:
+                self.logger.warning(f"Could not fit image in {self.target_size} bytes, even at quality 1")
+            if self.target_psnr is not None and quality == 100 and encoder.psnr(quality) < self.target_psnr:
+                self.logger.warning(f"Could not reach {self.target_psnr} dB PSNR, even at quality 100")
+            output.write(encoded)
+            format_used = 'JPEG'
+        elif self.backend == 'native':
+            self.logger.info(f"Encoding image using the native baseline JPEG engine with quality={self.quality}")
+            pixels = pixels if pixels is not None else np.asarray(image)
+            output.write(encode_baseline(pixels, self.quality, self.subsampling or '4:4:4'))
+            format_used = 'JPEG'
         else:
             # Use JPEG for lossy compression
             self.logger.info(f"Encoding image using lossy (JPEG) format with quality={self.quality}")
-            image.save(output, format='JPEG', quality=self.quality, optimize=True)
+            image = image if image is not None else Image.fromarray(pixels)
+            options = {'subsampling': self.subsampling} if self.subsampling else {}
+            image.save(output, format='JPEG', quality=self.quality, optimize=True, **options)
             format_used = 'JPEG'
         
         compressed_data = output.getvalue()
         
         metadata = {
-            'original_size': image.size,
-            'original_mode': image.mode,
+            'original_size': size,
+            'original_mode': mode,
             'format': format_used,
-            'quality': self.quality if not self.lossless else 100,
+            'quality': quality,
             'lossless': self.lossless,
+            'backend': self.backend if not self.lossless else 'pil',
             'compressed_size': len(compressed_data),
-            'original_data_size': len(image.tobytes())
+            'original_data_size': data_size
         }
         
         self.logger.info(f"Encoded image from {metadata['original_data_size']} bytes to {metadata['compressed_size']} bytes.")
         return compressed_data, metadata
     
-    def decode(self, encoded_data: bytes, metadata: Dict) -> Image.Image:
-        """Decode image data"""
+    def open(self, encoded_data: bytes, metadata: Dict) -> LazyJPEGImage:
+        """Return a lazy decode handle that reads only the header until its pixels are loaded"""
+        handle = LazyJPEGImage(encoded_data, metadata)
+        self.logger.info(f"Opened image with size {handle.size} and mode {handle.mode}")
+        return handle
+    
+    def decode(self, encoded_data: bytes, metadata: Dict, scale: float = None,
+               size: Tuple[int, int] = None) -> Image.Image:
+        """
+        Decode image data.
+        scale (1/2, 1/4 or 1/8) or a target size (width, height) decodes a
+        reduced image directly in the DCT domain; see LazyJPEGImage.load.
+        With Pillow (libjpeg draft mode) this is many times faster than a
+        full decode. The native engine still entropy-decodes every
+        coefficient, so it saves only the inverse DCT and colour conversion.
+        """
         super().decode(encoded_data, metadata)
-        import io
+        if scale not in (None, 1) or size is not None:
+            image = self.open(encoded_data, metadata).load(scale, size)
+            self.logger.info(f"Decoded image with size {image.size} and mode {image.mode}")
+            return image
+        if metadata.get('backend') == 'native' and metadata.get('format') == 'JPEG':
+            image = Image.fromarray(decode_baseline(encoded_data))
+            self.logger.info(f"Decoded image with size {image.size} and mode {image.mode}")
+            return image
         input_stream = io.BytesIO(encoded_data)
         image = Image.open(input_stream)
         self.logger.info(f"Decoded image with size {image.size} and mode {image.mode}")
         return image
+
+    def _options(self) -> Dict:
+        return {'quality': self.quality, 'lossless': self.lossless, 'backend': self.backend,
+                'subsampling': self.subsampling, 'target_size': self.target_size, 'target_psnr': self.target_psnr}
+
+    def _run_many(self, worker, items: Iterable, max_workers: Optional[int], max_in_flight: Optional[int],
+                  ordered: bool) -> Iterator:
+        executor = None if max_workers == 1 else ProcessPoolExecutor(max_workers)
+        run = bounded_map if ordered else bounded_as_completed
+        count = 0
+        try:
+            for result in run(partial(worker, self._options()), items, executor, max_in_flight):
+                count += 1
+                yield result
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            self.logger.info(f"Processed {count} images")
+
+    def encode_many(self, items: Iterable[Union[str, np.ndarray, Image.Image]], max_workers: Optional[int] = None,
+                    max_in_flight: Optional[int] = None, ordered: bool = True) -> Iterator:
+        """
+        Encode many images (paths, arrays or PIL images) across a process pool.
+        Yields (encoded_data, metadata) in input order, or (index, (encoded_data,
+        metadata)) as each finishes when ordered=False. Items are consumed
+        lazily and at most max_in_flight (default two per CPU) are queued, so
+        memory stays bounded for arbitrarily long inputs; passing paths keeps
+        pixel data out of the parent process. max_workers=1 runs in-process.
+        """
+        self.logger.info(f"Encoding images with {self.algorithm_name}, max_workers={max_workers}")
+        return self._run_many(_encode_image, items, max_workers, max_in_flight, ordered)
+
+    def decode_many(self, items: Iterable[Tuple[bytes, Dict]], max_workers: Optional[int] = None,
+                    max_in_flight: Optional[int] = None, ordered: bool = True) -> Iterator:
+        """Decode many (encoded_data, metadata) pairs across a process pool; see encode_many"""
+        self.logger.info(f"Decoding images with {self.algorithm_name}, max_workers={max_workers}")
+        return self._run_many(_decode_image, items, max_workers, max_in_flight, ordered)
@@ -0,0 +1,857 @@
+# algorithms/image/jpeg_native.py
+import struct
+import numpy as np
+from typing import Dict, List, Sequence, Tuple
+from algorithms.text.prefix_codes import length_limited_code_lengths
+from core.bitstream import BytesLike, pack_bits
+from core.dct import BLOCK_SIZE, UNZIGZAG, ZIGZAG, forward_dct, from_blocks, inverse_dct, to_blocks
+
+# Baseline JPEG (ITU T.81) markers
+SOI = 0xFFD8
+EOI = 0xFFD9
+APP0 = 0xFFE0
+DQT = 0xFFDB
+SOF0 = 0xFFC0
+SOF1 = 0xFFC1
+DHT = 0xFFC4
+SOS = 0xFFDA
+DRI = 0xFFDD
+
+# Annex K.1 quantization tables for quality 50, in natural order
+LUMINANCE_QUANT_TABLE = np.array([
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99
+])
+
+CHROMINANCE_QUANT_TABLE = np.array([
+    17, 18, 24, 47, 99, 99, 99, 99,
+    18, 21, 26, 66, 99, 99, 99, 99,
+    24, 26, 56, 99, 99, 99, 99, 99,
+    47, 66, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99,
+    99, 99, 99, 99, 99, 99, 99, 99
+])
+
+# Annex K.3 Huffman tables: code counts per length 1..16 and symbols in code order
+DC_LUMINANCE_BITS = [0, 1, 5, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0]
+DC_CHROMINANCE_BITS = [0, 3, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0]
+DC_VALUES = list(range(12))
+
+AC_LUMINANCE_BITS = [0, 2, 1, 3, 3, 2, 4, 3, 5, 5, 4, 4, 0, 0, 1, 0x7D]
+AC_LUMINANCE_VALUES = [
+    0x01, 0x02, 0x03, 0x00, 0x04, 0x11, 0x05, 0x12, 0x21, 0x31, 0x41, 0x06, 0x13, 0x51, 0x61, 0x07,
+    0x22, 0x71, 0x14, 0x32, 0x81, 0x91, 0xA1, 0x08, 0x23, 0x42, 0xB1, 0xC1, 0x15, 0x52, 0xD1, 0xF0,
+    0x24, 0x33, 0x62, 0x72, 0x82, 0x09, 0x0A, 0x16, 0x17, 0x18, 0x19, 0x1A, 0x25, 0x26, 0x27, 0x28,
+    0x29, 0x2A, 0x34, 0x35, 0x36, 0x37, 0x38, 0x39, 0x3A, 0x43, 0x44, 0x45, 0x46, 0x47, 0x48, 0x49,
+    0x4A, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59, 0x5A, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68, 0x69,
+    0x6A, 0x73, 0x74, 0x75, 0x76, 0x77, 0x78, 0x79, 0x7A, 0x83, 0x84, 0x85, 0x86, 0x87, 0x88, 0x89,
+    0x8A, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97, 0x98, 0x99, 0x9A, 0xA2, 0xA3, 0xA4, 0xA5, 0xA6, 0xA7,
+    0xA8, 0xA9, 0xAA, 0xB2, 0xB3, 0xB4, 0xB5, 0xB6, 0xB7, 0xB8, 0xB9, 0xBA, 0xC2, 0xC3, 0xC4, 0xC5,
+    0xC6, 0xC7, 0xC8, 0xC9, 0xCA, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9, 0xDA, 0xE1, 0xE2,
+    0xE3, 0xE4, 0xE5, 0xE6, 0xE7, 0xE8, 0xE9, 0xEA, 0xF1, 0xF2, 0xF3, 0xF4, 0xF5, 0xF6, 0xF7, 0xF8,
+    0xF9, 0xFA
+]
+
+AC_CHROMINANCE_BITS = [0, 2, 1, 2, 4, 4, 3, 4, 7, 5, 4, 4, 0, 1, 2, 0x77]
+AC_CHROMINANCE_VALUES = [
+    0x00, 0x01, 0x02, 0x03, 0x11, 0x04, 0x05, 0x21, 0x31, 0x06, 0x12, 0x41, 0x51, 0x07, 0x61, 0x71,
+    0x13, 0x22, 0x32, 0x81, 0x08, 0x14, 0x42, 0x91, 0xA1, 0xB1, 0xC1, 0x09, 0x23, 0x33, 0x52, 0xF0,
+    0x15, 0x62, 0x72, 0xD1, 0x0A, 0x16, 0x24, 0x34, 0xE1, 0x25, 0xF1, 0x17, 0x18, 0x19, 0x1A, 0x26,
+    0x27, 0x28, 0x29, 0x2A, 0x35, 0x36, 0x37, 0x38, 0x39, 0x3A, 0x43, 0x44, 0x45, 0x46, 0x47, 0x48,
+    0x49, 0x4A, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59, 0x5A, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68,
+    0x69, 0x6A, 0x73, 0x74, 0x75, 0x76, 0x77, 0x78, 0x79, 0x7A, 0x82, 0x83, 0x84, 0x85, 0x86, 0x87,
+    0x88, 0x89, 0x8A, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97, 0x98, 0x99, 0x9A, 0xA2, 0xA3, 0xA4, 0xA5,
+    0xA6, 0xA7, 0xA8, 0xA9, 0xAA, 0xB2, 0xB3, 0xB4, 0xB5, 0xB6, 0xB7, 0xB8, 0xB9, 0xBA, 0xC2, 0xC3,
+    0xC4, 0xC5, 0xC6, 0xC7, 0xC8, 0xC9, 0xCA, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8, 0xD9, 0xDA,
+    0xE2, 0xE3, 0xE4, 0xE5, 0xE6, 0xE7, 0xE8, 0xE9, 0xEA, 0xF2, 0xF3, 0xF4, 0xF5, 0xF6, 0xF7, 0xF8,
+    0xF9, 0xFA
+]
+
+# Luminance sampling factors (H, V) per chroma subsampling mode
+SUBSAMPLING = {
+    '4:4:4': (1, 1),
+    '4:2:2': (2, 1),
+    '4:2:0': (2, 2)
+}
+
+# Largest magnitudes baseline Huffman tables can code (categories 11 and 10)
+MAX_DC_DIFFERENCE = 2047
+MAX_AC_COEFFICIENT = 1023
+
+# Scale factors the decoder can apply in the DCT domain
+DECODE_SCALES = (1, 1 / 2, 1 / 4, 1 / 8)
+
+# Blocks tokenized at a time by the encoder
+TOKEN_SLICE_BLOCKS = 1 << 14
+
+# Code lookups index 16-bit windows; entries are (symbol << 5) | code length
+LOOKUP_BITS = 16
+
+# 0xFF fill appended to each entropy-coded segment: more than one block can
+# read (64 codes of at most 16 + 15 bits), so checking the bit position once
+# per block is enough to stop corrupt data before it runs off the end
+SEGMENT_PADDING = 256
+
+def quality_scaled_table(base: np.ndarray, quality: int) -> np.ndarray:
+    """Scale an Annex K table to quality 1..100 the way IJG libjpeg does, clamped to 8-bit baseline values"""
+    quality = min(max(int(quality), 1), 100)
+    scale = 5000 // quality if quality < 50 else 200 - 2 * quality
+    return np.clip((base * scale + 50) // 100, 1, 255)
+
+# JFIF (full-range BT.601) RGB -> YCbCr weights; Cb and Cr are offset by 128
+RGB_TO_YCBCR = np.array([[0.299, 0.587, 0.114],
+                         [-0.168736, -0.331264, 0.5],
+                         [0.5, -0.418688, -0.081312]], dtype=np.float32)
+
+def ycbcr_plane(pixels: np.ndarray, channel: int) -> np.ndarray:
+    """
+    One YCbCr channel (0 = Y, 1 = Cb, 2 = Cr) of an (H, W, 3) RGB array as
+    float32, computed straight from the (possibly strided) input so that no
+    float copy of the whole image is made.
+    """
+    weights = RGB_TO_YCBCR[channel]
+    plane = np.multiply(pixels[..., 0], weights[0], dtype=np.float32)
+    plane += np.multiply(pixels[..., 1], weights[1], dtype=np.float32)
+    plane += np.multiply(pixels[..., 2], weights[2], dtype=np.float32)
+    if channel:
+        plane += 128
+    return plane
+
+def rgb_to_ycbcr(pixels: np.ndarray) -> np.ndarray:
+    """JFIF RGB -> YCbCr on an (H, W, 3) array"""
+    return np.stack([ycbcr_plane(pixels, channel) for channel in range(3)], axis=-1)
+
+def ycbcr_to_rgb(ycbcr: np.ndarray) -> np.ndarray:
+    """JFIF YCbCr -> RGB, rounded and clipped to uint8"""
+    y = ycbcr[..., 0]
+    cb = ycbcr[..., 1] - 128
+    cr = ycbcr[..., 2] - 128
+    rgb = np.stack((y + 1.402 * cr, y - 0.344136 * cb - 0.714136 * cr, y + 1.772 * cb), axis=-1)
+    return np.clip(np.rint(rgb), 0, 255).astype(np.uint8)
+
+def _upsample_axis(plane: np.ndarray, factor: int, axis: int) -> np.ndarray:
+    if factor == 1:
+        return plane
+    if factor != 2:
+        return plane.repeat(factor, axis=axis)
+    # Triangle filter: each output sample is 3/4 its own input sample plus
+    # 1/4 the nearer neighbour, edges replicated (libjpeg "fancy" upsampling)
+    length = plane.shape[axis]
+    previous = np.take(plane, np.maximum(np.arange(length) - 1, 0), axis=axis)
+    following = np.take(plane, np.minimum(np.arange(length) + 1, length - 1), axis=axis)
+    out = np.stack((0.75 * plane + 0.25 * previous, 0.75 * plane + 0.25 * following), axis=axis + 1)
+    return out.reshape(plane.shape[:axis] + (2 * length,) + plane.shape[axis + 1:])
+
+def upsample(plane: np.ndarray, factor_y: int, factor_x: int) -> np.ndarray:
+    """
+    Upsample a subsampled chroma plane by integer factors. Factors of 2 use
+    libjpeg's interpolating triangle filter, so 4:2:0 and 4:2:2 output matches
+    Pillow closely; other factors replicate samples.
+    """
+    return _upsample_axis(_upsample_axis(plane, factor_y, 0), factor_x, 1)
+
+def _idct_size(scale: float) -> int:
+    """Inverse DCT size for a decode scale factor"""
+    size = scale * BLOCK_SIZE
+    if size not in (1, 2, 4, 8):
+        raise ValueError(f"Unsupported decode scale {scale}; expected one of {DECODE_SCALES}")
+    return int(size)
+
+def _scaled(length: int, size: int) -> int:
+    return -(-length * size // BLOCK_SIZE)
+
+def choose_scale(width: int, height: int, target: Tuple[int, int]) -> float:
+    """Smallest decode scale whose output is still at least target (width, height), like PIL's draft()"""
+    for scale in reversed(DECODE_SCALES):
+        if _scaled(width, int(scale * BLOCK_SIZE)) >= target[0] and \
+                _scaled(height, int(scale * BLOCK_SIZE)) >= target[1]:
+            return scale
+    return 1
+
+def _categories(values: np.ndarray) -> np.ndarray:
+    """JPEG magnitude category (bit length of |value|) of every element"""
+    return np.frexp(np.abs(values).astype(np.float64))[1].astype(np.int64)
+
+def _segment(marker: int, payload: bytes) -> bytes:
+    return struct.pack('>HH', marker, len(payload) + 2) + payload
+
+class HuffmanTable:
+    """
+    JPEG Huffman table in DHT form: code counts per length (bits) and symbols
+    in code order (values). Codes are assigned as in Annex C: consecutive
+    values within a length, doubling when moving to the next length.
+    """
+
+    def __init__(self, bits: Sequence[int], values: Sequence[int]):
+        if len(bits) != 16 or sum(bits) != len(values):
+            raise ValueError("Malformed Huffman table")
+        self.bits = list(bits)
+        self.values = list(values)
+        self.codes = np.zeros(256, dtype=np.int64)
+        self.lengths = np.zeros(256, dtype=np.int64)
+        code = 0
+        symbols = iter(self.values)
+        for length, count in enumerate(self.bits, start=1):
+            for _ in range(count):
+                symbol = next(symbols)
+                self.codes[symbol] = code
+                self.lengths[symbol] = length
+                code += 1
+            code <<= 1
+        self._lookup = None
+
+    @classmethod
+    def optimal(cls, counts: np.ndarray) -> 'HuffmanTable':
+        """
+        Length-limited optimal table for symbol counts (a length-256 array).
+        A dummy symbol that takes the longest code keeps the all-ones code
+        unused, as the standard requires.
+        """
+        frequencies = {symbol: count for symbol, count in enumerate(counts.tolist()) if count}
+        frequencies[256] = 1
+        lengths = length_limited_code_lengths(frequencies, 16)
+        longest = max(lengths.values())
+        if lengths[256] != longest:
+            swap = max(symbol for symbol, length in lengths.items() if length == longest)
+            lengths[swap], lengths[256] = lengths[256], longest
+        ordered = sorted(lengths.items(), key=lambda item: (item[1], item[0]))[:-1]
+        bits = [0] * 16
+        for _, length in ordered:
+            bits[length - 1] += 1
+        return cls(bits, [symbol for symbol, _ in ordered])
+
+    @property
+    def lookup(self) -> List[int]:
+        """16-bit window -> (symbol << 5) | code length; 0 marks an invalid code"""
+        if self._lookup is None:
+            table = np.zeros(1 << LOOKUP_BITS, dtype=np.int64)
+            for symbol in self.values:
+                length = int(self.lengths[symbol])
+                start = int(self.codes[symbol]) << (LOOKUP_BITS - length)
+                table[start:start + (1 << (LOOKUP_BITS - length))] = (symbol << 5) | length
+            self._lookup = table.tolist()
+        return self._lookup
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.bits) + bytes(self.values)
+
+STANDARD_TABLES = {
+    'dc': (HuffmanTable(DC_LUMINANCE_BITS, DC_VALUES), HuffmanTable(DC_CHROMINANCE_BITS, DC_VALUES)),
+    'ac': (HuffmanTable(AC_LUMINANCE_BITS, AC_LUMINANCE_VALUES),
+           HuffmanTable(AC_CHROMINANCE_BITS, AC_CHROMINANCE_VALUES))
+}
+
+class _Component:
+    """One colour component of a frame and its block grid"""
+    __slots__ = ('identifier', 'h', 'v', 'table', 'width', 'height', 'grid', 'blocks')
+
+    def __init__(self, identifier: int, h: int, v: int, table: int):
+        self.identifier = identifier
+        self.h = h
+        self.v = v
+        self.table = table
+        self.width = self.height = 0
+        self.grid = (0, 0)
+        self.blocks = None
+
+    def layout(self, width: int, height: int, h_max: int, v_max: int, interleaved: bool) -> None:
+        """Component size and padded block grid (whole MCUs when interleaved)"""
+        self.width = -(-width * self.h // h_max)
+        self.height = -(-height * self.v // v_max)
+        if interleaved:
+            self.grid = (-(-height // (BLOCK_SIZE * v_max)) * self.v, -(-width // (BLOCK_SIZE * h_max)) * self.h)
+        else:
+            self.grid = (-(-self.height // BLOCK_SIZE), -(-self.width // BLOCK_SIZE))
+
+def _scan_order(components: List[_Component], interleaved: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (component index, block index within that component) of every block in
+    scan order: raster order for a single component, MCU by MCU otherwise.
+    """
+    if not interleaved:
+        count = components[0].grid[0] * components[0].grid[1]
+        return np.zeros(count, dtype=np.int64), np.arange(count)
+    mcus_y = components[0].grid[0] // components[0].v
+    mcus_x = components[0].grid[1] // components[0].h
+    mcu = np.arange(mcus_y * mcus_x)
+    mcu_row, mcu_column = mcu // mcus_x, mcu % mcus_x
+    indices = []
+    owners = []
+    for c, component in enumerate(components):
+        v, h = np.divmod(np.arange(component.v * component.h), component.h)
+        rows = mcu_row[:, None] * component.v + v
+        columns = mcu_column[:, None] * component.h + h
+        indices.append(rows * component.grid[1] + columns)
+        owners.append(np.full(indices[-1].shape, c))
+    return np.concatenate(owners, axis=1).ravel(), np.concatenate(indices, axis=1).ravel()
+
+def reconstruct(components: List[_Component], dequantized: List[np.ndarray], width: int, height: int,
+                size: int = BLOCK_SIZE) -> np.ndarray:
+    """
+    Pixels from each component's dequantized (N, 64) natural-order
+    coefficients: inverse DCT (size-point for scaled decoding), level shift,
+    chroma upsampling and YCbCr -> RGB. Returns uint8 (H, W) or (H, W, 3).
+    """
+    h_max = max(component.h for component in components)
+    v_max = max(component.v for component in components)
+    height, width = _scaled(height, size), _scaled(width, size)
+    planes = []
+    for component, coefficients in zip(components, dequantized):
+        blocks = inverse_dct(coefficients.reshape(-1, BLOCK_SIZE, BLOCK_SIZE).astype(np.float32), size)
+        plane = from_blocks(blocks, component.grid,
+                            (_scaled(component.height, size), _scaled(component.width, size))) + 128
+        if len(components) > 1:
+            plane = upsample(plane, v_max // component.v, h_max // component.h)
+        planes.append(plane[:height, :width])
+    if len(planes) == 1:
+        return np.clip(np.rint(planes[0]), 0, 255).astype(np.uint8)
+    return ycbcr_to_rgb(np.stack(planes, axis=-1))
+
+class BaselineJPEGEncoder:
+    """
+    Baseline sequential JPEG encoder in NumPy.
+
+    The image is converted to YCbCr, optionally chroma-subsampled, split into
+    an (N, 8, 8) block array per component and transformed with batched
+    matrix-multiply DCTs once, on construction. encode(quality) then only
+    quantizes (vectorized, with IJG quality-scaled Annex K tables), reorders
+    into zigzag order by fancy indexing and Huffman codes the result, so the
+    same image can be encoded at several qualities cheaply. The output is a
+    standard JFIF file.
+
+    pixels may be any uint8 array view (C-contiguous or strided); it is read
+    in place and never copied whole.
+    """
+
+    def __init__(self, pixels: np.ndarray, subsampling: str = '4:4:4'):
+        pixels = np.asarray(pixels)
+        if pixels.dtype != np.uint8:
+            raise ValueError(f"Expected uint8 pixels, got {pixels.dtype}")
+        if subsampling not in SUBSAMPLING:
+            raise ValueError(f"Unknown subsampling {subsampling}; expected one of {list(SUBSAMPLING)}")
+        self.height, self.width = pixels.shape[:2]
+        self.pixels = pixels  # a reference, kept to measure PSNR
+        if pixels.ndim == 2:
+            self.components = [_Component(1, 1, 1, 0)]
+        elif pixels.ndim == 3 and pixels.shape[2] == 3:
+            h, v = SUBSAMPLING[subsampling]
+            self.components = [_Component(1, h, v, 0), _Component(2, 1, 1, 1), _Component(3, 1, 1, 1)]
+        else:
+            raise ValueError(f"Expected an (H, W) or (H, W, 3) array, got shape {pixels.shape}")
+        if not (0 < self.width < 1 << 16 and 0 < self.height < 1 << 16):
+            raise ValueError(f"Image size {self.width}x{self.height} is outside the JPEG range")
+
+        h_max = max(component.h for component in self.components)
+        v_max = max(component.v for component in self.components)
+        self.interleaved = len(self.components) > 1
+        for c, component in enumerate(self.components):
+            # Planes are built one at a time, so peak memory is about one float plane
+            plane = pixels.astype(np.float32) if pixels.ndim == 2 else ycbcr_plane(pixels, c)
+            component.layout(self.width, self.height, h_max, v_max, self.interleaved)
+            plane = self._downsample(plane, h_max // component.h, v_max // component.v)
+            rows, columns = component.grid
+            plane = np.pad(plane, ((0, rows * BLOCK_SIZE - plane.shape[0]), (0, columns * BLOCK_SIZE - plane.shape[1])),
+                           mode='edge')
+            blocks, _ = to_blocks(plane - 128)
+            component.blocks = forward_dct(blocks).reshape(-1, BLOCK_SIZE * BLOCK_SIZE)
+        self._owners, self._indices = _scan_order(self.components, self.interleaved)
+
+    @staticmethod
+    def _downsample(plane: np.ndarray, factor_x: int, factor_y: int) -> np.ndarray:
+        """Average factor_y x factor_x neighbourhoods, padding edges by replication"""
+        if factor_x == factor_y == 1:
+            return plane
+        plane = np.pad(plane, ((0, -plane.shape[0] % factor_y), (0, -plane.shape[1] % factor_x)), mode='edge')
+        height, width = plane.shape
+        return plane.reshape(height // factor_y, factor_y, width // factor_x, factor_x).mean(axis=(1, 3))
+
+    def quantization_tables(self, quality: int) -> List[np.ndarray]:
+        tables = [quality_scaled_table(LUMINANCE_QUANT_TABLE, quality)]
+        if len(self.components) > 1:
+            tables.append(quality_scaled_table(CHROMINANCE_QUANT_TABLE, quality))
+        return tables
+
+    def quantize(self, tables: List[np.ndarray]) -> np.ndarray:
+        """Quantized coefficients of every block in scan order, zigzag-ordered, as an (N, 64) array"""
+        per_component = []
+        for component in self.components:
+            quantized = np.rint(component.blocks / tables[component.table]).astype(np.int32)
+            per_component.append(quantized[:, ZIGZAG])
+        offsets = np.cumsum([0] + [len(q) for q in per_component])[:-1]
+        coefficients = np.concatenate(per_component)[offsets[self._owners] + self._indices]
+        np.clip(coefficients[:, 1:], -MAX_AC_COEFFICIENT, MAX_AC_COEFFICIENT, out=coefficients[:, 1:])
+        return coefficients
+
+    def _dc_differences(self, coefficients: np.ndarray) -> np.ndarray:
+        """DC coefficient minus the previous DC of the same component, in scan order"""
+        dc = coefficients[:, 0].astype(np.int32)
+        differences = np.empty_like(dc)
+        for c in range(len(self.components)):
+            mask = self._owners == c
+            differences[mask] = np.diff(dc[mask], prepend=0)
+        if np.abs(differences).max(initial=0) > MAX_DC_DIFFERENCE:
+            raise ValueError("DC difference out of baseline range")
+        return differences
+
+    def _tokens(self, coefficients: np.ndarray, differences: np.ndarray,
+                block_tables: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Tokenize a run of blocks in coding order: every DC difference, AC
+        coefficient, zero run (ZRL) and end-of-block becomes a Huffman table
+        selector (2 * is_ac + table), a symbol and its extra magnitude bits.
+        Tokens are stored compactly so a whole image's worth stays small.
+        """
+        blocks, columns = np.nonzero(coefficients[:, 1:])
+        positions = columns + 1
+        values = coefficients[blocks, positions]
+        previous = np.concatenate(([0], positions[:-1]))
+        previous[np.concatenate(([True], blocks[1:] != blocks[:-1]))] = 0
+        runs = positions - previous - 1
+        zrl_counts = runs >> 4
+        eob_blocks = np.flatnonzero(coefficients[:, -1] == 0)
+        zrl_blocks = np.repeat(blocks, zrl_counts)
+
+        # Sort keys: the DC first, each coefficient after its ZRLs, the EOB last
+        stride = 2 * BLOCK_SIZE * BLOCK_SIZE + 1
+        block_count = len(coefficients)
+        key = np.concatenate((np.arange(block_count) * stride, blocks * stride + 2 * positions,
+                              zrl_blocks * stride + np.repeat(2 * positions - 1, zrl_counts),
+                              eob_blocks * stride + stride - 1))
+        order = np.argsort(key, kind='stable')
+        del key
+
+        markers = len(zrl_blocks) + len(eob_blocks)
+        dc_categories = _categories(differences)
+        ac_categories = _categories(values)
+        selector = np.concatenate((block_tables, 2 + block_tables[blocks], 2 + block_tables[zrl_blocks],
+                                   2 + block_tables[eob_blocks]))[order]
+        symbol = np.concatenate((dc_categories, ((runs & 15) << 4) | ac_categories,
+                                 np.full(len(zrl_blocks), 0xF0), np.zeros(len(eob_blocks), dtype=np.int64)))[order]
+        extra_length = np.concatenate((dc_categories, ac_categories, np.zeros(markers, dtype=np.int64)))[order]
+        extra = np.concatenate((differences, values, np.zeros(markers, dtype=np.int32))).astype(np.int32)[order]
+        # Negative magnitudes are sent as their one's complement in extra_length bits
+        extra = np.where(extra < 0, extra + (1 << extra_length) - 1, extra)
+        return (selector.astype(np.uint8), symbol.astype(np.uint8), extra.astype(np.uint16),
+                extra_length.astype(np.uint8))
+
+    def encode(self, quality: int = 75, optimize: bool = True) -> bytes:
+        """Encode at quality (1..100); optimize builds image-specific Huffman tables"""
+        tables = self.quantization_tables(quality)
+        coefficients = self.quantize(tables)
+        differences = self._dc_differences(coefficients)
+        block_tables = np.array([component.table for component in self.components])[self._owners]
+
+        # Tokenize a slice of blocks at a time to bound the temporaries
+        tokens = [self._tokens(coefficients[start:start + TOKEN_SLICE_BLOCKS],
+                               differences[start:start + TOKEN_SLICE_BLOCKS],
+                               block_tables[start:start + TOKEN_SLICE_BLOCKS])
+                  for start in range(0, len(coefficients), TOKEN_SLICE_BLOCKS)]
+        del coefficients, differences
+        selector, symbol, extra, extra_length = (np.concatenate(parts) for parts in zip(*tokens))
+        del tokens
+
+        huffman = {}
+        counts = np.bincount(selector.astype(np.int64) * 256 + symbol, minlength=4 * 256).reshape(4, 256)
+        for kind in ('dc', 'ac'):
+            for table_id in range(len(tables)):
+                table_counts = counts[2 * (kind == 'ac') + table_id]
+                huffman[kind, table_id] = HuffmanTable.optimal(table_counts) if optimize and table_counts.any() \
+                    else STANDARD_TABLES[kind][table_id]
+
+        codes = np.zeros((4, 256), dtype=np.uint32)
+        lengths = np.zeros((4, 256), dtype=np.uint8)
+        for (kind, table_id), table in huffman.items():
+            codes[2 * (kind == 'ac') + table_id] = table.codes
+            lengths[2 * (kind == 'ac') + table_id] = table.lengths
+        code_length = lengths[selector, symbol]
+        if not code_length.all():
+            raise ValueError("Symbol missing from Huffman table")
+        words = (codes[selector, symbol] << extra_length) | extra
+        scan = pack_bits(words, code_length + extra_length, pad_bit=1)
+        scan = np.frombuffer(scan, dtype=np.uint8)
+        scan = np.insert(scan, np.flatnonzero(scan == 0xFF) + 1, 0).tobytes()  # byte stuffing
+        return self._headers(tables, huffman) + scan + struct.pack('>H', EOI)
+
+    def psnr(self, quality: int) -> float:
+        """
+        PSNR (dB) of the image a decoder reconstructs at quality, against the
+        input pixels. Decoding is simulated from the cached coefficients with
+        the decoder's own reconstruction (inverse DCT, chroma upsampling,
+        YCbCr -> RGB, rounding), so no entropy coding or decoding is needed
+        and the result matches decode_baseline on the encoded file.
+        """
+        tables = self.quantization_tables(quality)
+        dequantized = []
+        for component in self.components:
+            table = tables[component.table]
+            quantized = np.rint(component.blocks / table)
+            np.clip(quantized[:, 1:], -MAX_AC_COEFFICIENT, MAX_AC_COEFFICIENT, out=quantized[:, 1:])
+            dequantized.append(quantized * table)
+        decoded = reconstruct(self.components, dequantized, self.width, self.height)
+        squared_error = np.square(decoded.astype(np.float64) - self.pixels).sum()
+        if squared_error == 0:
+            return float('inf')
+        return float(10 * np.log10(255 ** 2 * decoded.size / squared_error))
+
+    def encode_to_target(self, target_size: int = None, target_psnr: float = None,
+                         optimize: bool = True) -> Tuple[bytes, int]:
+        """
+        Binary-search quality 1..100 for a byte budget or a quality floor,
+        returning (encoded, quality). target_size picks the highest quality
+        whose output fits (quality 1 if none does); target_psnr picks the
+        lowest quality whose decoded pixels reach it (quality 100 if none
+        does; see psnr). Each probe
+        reuses the cached DCT coefficients, and PSNR probes skip entropy
+        coding altogether.
+        """
+        if (target_size is None) == (target_psnr is None):
+            raise ValueError("Specify exactly one of target_size and target_psnr")
+        low, high = 1, 100
+        if target_psnr is not None:
+            while low < high:
+                middle = (low + high) // 2
+                if self.psnr(middle) >= target_psnr:
+                    high = middle
+                else:
+                    low = middle + 1
+            return self.encode(low, optimize), low
+
+        best = None
+        while low < high:
+            middle = (low + high + 1) // 2
+            encoded = self.encode(middle, optimize)
+            if len(encoded) <= target_size:
+                low, best = middle, encoded
+            else:
+                high = middle - 1
+        return best if best is not None else self.encode(low, optimize), low
+
+    def _headers(self, tables: List[np.ndarray], huffman: Dict) -> bytes:
+        parts = [struct.pack('>H', SOI),
+                 _segment(APP0, b'JFIF\x00' + struct.pack('>BBBHHBB', 1, 1, 0, 1, 1, 0, 0))]
+        parts.append(_segment(DQT, b''.join(bytes([t]) + table[ZIGZAG].astype(np.uint8).tobytes()
+                                            for t, table in enumerate(tables))))
+        frame = struct.pack('>BHHB', 8, self.height, self.width, len(self.components))
+        for component in self.components:
+            frame += bytes([component.identifier, (component.h << 4) | component.v, component.table])
+        parts.append(_segment(SOF0, frame))
+        parts.append(_segment(DHT, b''.join(bytes([(kind == 'ac') << 4 | t]) + table.to_bytes()
+                                            for (kind, t), table in huffman.items())))
+        scan = bytes([len(self.components)])
+        for component in self.components:
+            scan += bytes([component.identifier, (component.table << 4) | component.table])
+        parts.append(_segment(SOS, scan + bytes([0, 63, 0])))
+        return b''.join(parts)
+
+def encode_baseline(pixels: np.ndarray, quality: int = 75, subsampling: str = '4:4:4', optimize: bool = True) -> bytes:
+    """Encode a uint8 (H, W) grayscale or (H, W, 3) RGB array as a baseline JFIF file"""
+    return BaselineJPEGEncoder(pixels, subsampling).encode(quality, optimize)
+
+class BaselineJPEGDecoder:
+    """
+    Baseline sequential JPEG decoder, the inverse of BaselineJPEGEncoder.
+
+    Decodes any baseline (SOF0/SOF1, 8-bit, Huffman) grayscale or YCbCr file,
+    including subsampled chroma, restart intervals and one scan per component.
+    Entropy decoding walks the bits with 16-bit table lookups; dequantization,
+    the inverse DCT, upsampling and colour conversion are vectorized.
+    """
+
+    def __init__(self, data: BytesLike):
+        self.data = bytes(data)
+        self.quant_tables: Dict[int, np.ndarray] = {}
+        self.huffman_tables: Dict[Tuple[int, int], HuffmanTable] = {}
+        self.components: List[_Component] = []
+        self.width = self.height = 0
+        self.restart_interval = 0
+
+    def _segments(self):
+        """Yield (marker, payload start, payload end), resuming after each scan's entropy data"""
+        data = self.data
+        if data[:2] != b'\xff\xd8':
+            raise ValueError("Not a JPEG file: missing SOI marker")
+        position = 2
+        while position < len(data):
+            if data[position] != 0xFF or position + 2 > len(data):
+                raise ValueError(f"Expected a marker at offset {position}")
+            marker = 0xFF00 | data[position + 1]
+            position += 2
+            if marker == 0xFFFF:  # fill byte
+                position -= 1
+                continue
+            if marker == EOI:
+                return
+            if position + 2 > len(data):
+                raise ValueError("Truncated JPEG segment")
+            (length,) = struct.unpack_from('>H', data, position)
+            start, end = position + 2, position + length
+            if length < 2 or end > len(data):
+                raise ValueError("Truncated JPEG segment")
+            position = yield marker, start, end
+            if position is None:
+                position = end
+
+    def _read_frame(self, payload: bytes) -> None:
+        if len(payload) < 6:
+            raise ValueError("Truncated frame header")
+        precision, self.height, self.width, count = struct.unpack_from('>BHHB', payload)
+        if precision != 8:
+            raise ValueError(f"Unsupported sample precision {precision}")
+        if count not in (1, 3) or len(payload) < 6 + 3 * count:
+            raise ValueError(f"Unsupported component count {count}")
+        if not self.width or not self.height:
+            raise ValueError(f"Invalid image size {self.width}x{self.height}")
+        self.components = []
+        for i in range(count):
+            identifier, sampling, table = payload[6 + 3 * i:9 + 3 * i]
+            self.components.append(_Component(identifier, sampling >> 4, sampling & 15, table))
+        h_max = max(component.h for component in self.components)
+        v_max = max(component.v for component in self.components)
+        if any(not component.h or not component.v or h_max % component.h or v_max % component.v
+               for component in self.components):
+            raise ValueError("Unsupported sampling factors")
+        for component in self.components:
+            component.layout(self.width, self.height, h_max, v_max, count > 1)
+
+    def _read_quant_tables(self, payload: bytes) -> None:
+        offset = 0
+        while offset < len(payload):
+            precision, table_id = payload[offset] >> 4, payload[offset] & 15
+            size = 128 if precision else 64
+            raw = np.frombuffer(payload, dtype='>u2' if precision else np.uint8, count=64, offset=offset + 1)
+            table = np.empty(64, dtype=np.int32)
+            table[ZIGZAG] = raw
+            self.quant_tables[table_id] = table
+            offset += 1 + size
+
+    def _read_huffman_tables(self, payload: bytes) -> None:
+        offset = 0
+        while offset < len(payload):
+            table_class, table_id = payload[offset] >> 4, payload[offset] & 15
+            bits = list(payload[offset + 1:offset + 17])
+            values = list(payload[offset + 17:offset + 17 + sum(bits)])
+            self.huffman_tables[table_class, table_id] = HuffmanTable(bits, values)
+            offset += 17 + sum(bits)
+
+    def read_coefficients(self, size: int = BLOCK_SIZE) -> List[_Component]:
+        """
+        Parse the file and entropy-decode every scan into each component's
+        quantized zigzag coefficients. With size < 8 only the top-left
+        size x size coefficients (those a size-point inverse DCT reads) are
+        stored; the rest are still decoded to find the next code, then dropped.
+        """
+        # Indexed by zigzag position; padded past 63 so an overlong run is caught by the range check
+        wanted = [bool(row < size and column < size) for row, column in
+                  (divmod(int(index), BLOCK_SIZE) for index in ZIGZAG)] + [False] * 16
+        segments = self._segments()
+        resume = None
+        while True:
+            try:
+                marker, start, end = segments.send(resume)
+            except StopIteration:
+                break
+            resume = None
+            payload = self.data[start:end]
+            if marker in (SOF0, SOF1):
+                self._read_frame(payload)
+            elif 0xFFC2 <= marker <= 0xFFCF and marker not in (DHT, 0xFFC8, 0xFFCC):
+                raise ValueError("Only baseline sequential Huffman JPEG files are supported")
+            elif marker == DQT:
+                self._read_quant_tables(payload)
+            elif marker == DHT:
+                self._read_huffman_tables(payload)
+            elif marker == DRI:
+                if len(payload) < 2:
+                    raise ValueError("Truncated restart interval")
+                (self.restart_interval,) = struct.unpack_from('>H', payload)
+            elif marker == SOS:
+                if not self.components:
+                    raise ValueError("Scan before frame header")
+                resume = self._decode_scan(payload, end, wanted)
+        if not self.components:
+            raise ValueError("JPEG file has no frame header")
+        return self.components
+
+    def _entropy_segments(self, position: int) -> Tuple[List[bytes], int]:
+        """Split the entropy-coded data at restart markers and undo byte stuffing"""
+        data = self.data
+        segments = []
+        start = position
+        while True:
+            position = data.find(b'\xff', position)
+            if position < 0 or position + 1 >= len(data):
+                raise ValueError("Entropy-coded data is not terminated by a marker")
+            following = data[position + 1]
+            if following == 0x00:
+                position += 2
+            elif 0xD0 <= following <= 0xD7:
+                segments.append(data[start:position].replace(b'\xff\x00', b'\xff'))
+                position += 2
+                start = position
+            else:
+                segments.append(data[start:position].replace(b'\xff\x00', b'\xff'))
+                return segments, position
+
+    def _decode_scan(self, header: bytes, position: int, wanted: List[bool]) -> int:
+        count = header[0] if header else 0
+        if not count or len(header) < 4 + 2 * count:
+            raise ValueError("Truncated scan header")
+        by_id = {component.identifier: c for c, component in enumerate(self.components)}
+        scan = []
+        for i in range(count):
+            identifier, tables = header[1 + 2 * i:3 + 2 * i]
+            if identifier not in by_id:
+                raise ValueError(f"Scan references unknown component {identifier}")
+            scan.append((by_id[identifier], tables >> 4, tables & 15))
+        start, end = header[1 + 2 * count], header[2 + 2 * count]
+        if (start, end) != (0, 63):
+            raise ValueError("Only baseline sequential Huffman JPEG files are supported")
+
+        components = [self.components[c] for c, _, _ in scan]
+        for component in components:
+            if component.blocks is None:  # allocated on first use, so header-only parsing stays cheap
+                component.blocks = np.zeros((component.grid[0] * component.grid[1], BLOCK_SIZE * BLOCK_SIZE),
+                                            dtype=np.int32)
+        if count == 1:
+            component = components[0]
+            columns = -(-component.width // BLOCK_SIZE)
+            rows = -(-component.height // BLOCK_SIZE)
+            block_index = (np.arange(rows)[:, None] * component.grid[1] + np.arange(columns)).ravel()
+            owners = np.zeros(rows * columns, dtype=np.int64)
+            blocks_per_mcu = 1
+        else:
+            owners, block_index = _scan_order(components, True)
+            blocks_per_mcu = sum(component.h * component.v for component in components)
+
+        segments, end_position = self._entropy_segments(position)
+        try:
+            dc_lookups = [self.huffman_tables[0, dc].lookup for _, dc, _ in scan]
+            ac_lookups = [self.huffman_tables[1, ac].lookup for _, _, ac in scan]
+        except KeyError:
+            raise ValueError("Scan uses an undefined Huffman table")
+        blocks_per_interval = self.restart_interval * blocks_per_mcu or len(owners)
+
+        owners = owners.tolist()
+        flat_index = []
+        flat_value = []
+        for segment_number, first in enumerate(range(0, len(owners), blocks_per_interval)):
+            if segment_number >= len(segments):
+                raise ValueError("Entropy-coded data ends early")
+            segment = np.frombuffer(segments[segment_number] + b'\xff' * SEGMENT_PADDING,
+                                    dtype=np.uint8).astype(np.int64)
+            windows = ((segment[:-2] << 16) | (segment[1:-1] << 8) | segment[2:]).tolist()
+            limit = (len(segment) - SEGMENT_PADDING) * 8
+            bit = 0
+            predictions = [0] * count
+            for block in range(first, min(first + blocks_per_interval, len(owners))):
+                if bit > limit:
+                    raise ValueError("Entropy-coded data ends early")
+                c = owners[block]
+                base = block * 64
+                entry = dc_lookups[c][(windows[bit >> 3] >> (8 - (bit & 7))) & 0xFFFF]
+                if not entry & 31:
+                    raise ValueError("Invalid Huffman code in entropy-coded data")
+                bit += entry & 31
+                size = entry >> 5
+                difference = 0
+                if size > 11:
+                    raise ValueError("DC difference category out of range")
+                if size:
+                    difference = (windows[bit >> 3] >> (24 - (bit & 7) - size)) & ((1 << size) - 1)
+                    if difference < 1 << (size - 1):
+                        difference -= (1 << size) - 1
+                    bit += size
+                predictions[c] += difference
+                flat_index.append(base)
+                flat_value.append(predictions[c])
+
+                lookup = ac_lookups[c]
+                k = 1
+                while k < 64:
+                    entry = lookup[(windows[bit >> 3] >> (8 - (bit & 7))) & 0xFFFF]
+                    if not entry & 31:
+                        raise ValueError("Invalid Huffman code in entropy-coded data")
+                    bit += entry & 31
+                    run, size = entry >> 9, (entry >> 5) & 15
+                    if not size:
+                        if run != 15:
+                            break  # end of block
+                        k += 16
+                        continue
+                    k += run
+                    if k > 63:
+                        raise ValueError("AC coefficient index out of range")
+                    if wanted[k]:
+                        value = (windows[bit >> 3] >> (24 - (bit & 7) - size)) & ((1 << size) - 1)
+                        if value < 1 << (size - 1):
+                            value -= (1 << size) - 1
+                        flat_index.append(base + k)
+                        flat_value.append(value)
+                    bit += size
+                    k += 1
+            if bit > limit + 7:
+                raise ValueError("Entropy-coded data ends early")
+
+        flat_index = np.array(flat_index, dtype=np.int64)
+        block = flat_index >> 6
+        owners_array = np.array(owners, dtype=np.int64)
+        block_index = np.asarray(block_index)
+        values = np.array(flat_value, dtype=np.int32)
+        for c, (component_index, _, _) in enumerate(scan):
+            mask = owners_array[block] == c
+            self.components[component_index].blocks[block_index[block[mask]], flat_index[mask] & 63] = values[mask]
+        return end_position
+
+    def read_header(self) -> 'BaselineJPEGDecoder':
+        """Parse the segments before the first scan (tables and frame header) without touching the pixel data"""
+        segments = self._segments()
+        for marker, start, end in segments:
+            payload = self.data[start:end]
+            if marker in (SOF0, SOF1):
+                self._read_frame(payload)
+            elif marker == DQT:
+                self._read_quant_tables(payload)
+            elif marker == DHT:
+                self._read_huffman_tables(payload)
+            elif marker == SOS:
+                break
+        segments.close()
+        if not self.components:
+            raise ValueError("JPEG file has no baseline frame header")
+        return self
+
+    @property
+    def mode(self) -> str:
+        return 'L' if len(self.components) == 1 else 'RGB'
+
+    def decode(self, scale: float = 1) -> np.ndarray:
+        """
+        Decode to a uint8 (H, W) grayscale or (H, W, 3) RGB array.
+        scale (1/2, 1/4 or 1/8) downscales in the DCT domain: each block is
+        rebuilt from its low-frequency coefficients with a smaller inverse DCT,
+        and the other coefficients are not stored. Every Huffman code must
+        still be read, so entropy decoding, which dominates the decode time,
+        costs nearly as much as at full size.
+        """
+        size = _idct_size(scale)
+        components = self.read_coefficients(size)
+        dequantized = []
+        for component in components:
+            if component.blocks is None:
+                raise ValueError(f"Component {component.identifier} is missing from every scan")
+            if component.table not in self.quant_tables:
+                raise ValueError(f"Undefined quantization table {component.table}")
+            dequantized.append(component.blocks[:, UNZIGZAG] * self.quant_tables[component.table])
+        return reconstruct(components, dequantized, self.width, self.height, size)
+
+def decode_baseline(data: BytesLike, scale: float = 1) -> np.ndarray:
+    """Decode a baseline JPEG file to a uint8 (H, W) grayscale or (H, W, 3) RGB array, optionally downscaled"""
+    return BaselineJPEGDecoder(data).decode(scale)
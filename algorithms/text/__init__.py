@@ -3,7 +3,7 @@
 Text coding algorithms implementation.
 
 Contains implementations of various text compression and coding algorithms
-including Shannon-Fano, Huffman, Arithmetic, Run Length, and LZW coding.
+including Shannon-Fano, Huffman, Arithmetic, Run Length, LZW and Adaptive Huffman coding.
 """
 
 from algorithms.text.shannon_fano import ShannonFanoCoder
@@ -11,11 +11,17 @@ from algorithms.text.huffman import HuffmanCoder
 from algorithms.text.arithmetic import ArithmeticCoder
 from algorithms.text.run_length import RunLengthCoder
 from algorithms.text.lzw import LZWCoder
+from algorithms.text.adaptive_huffman import AdaptiveHuffmanCoder
+from algorithms.text.block_parallel import BlockParallelCoder
+from algorithms.text.pipeline import TransformPipelineCoder
 
 __all__ = [
     'ShannonFanoCoder',
     'HuffmanCoder', 
     'ArithmeticCoder',
     'RunLengthCoder',
-    'LZWCoder'
+    'LZWCoder',
+    'AdaptiveHuffmanCoder',
+    'BlockParallelCoder',
+    'TransformPipelineCoder'
 ]
@@ -0,0 +1,222 @@
+# algorithms/text/adaptive_huffman.py
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from core.base_coder import TextCoder
+from core.bitstream import BitReader, BitWriter, BytesLike
+from core.utils import as_text_input
+from algorithms.text.prefix_codes import bit_string_to_bytes
+
+# Literal byte sent after the NYT code to mark the end of the stream; it can
+# never start a UTF-8 sequence, so it does not collide with real literals
+END_OF_STREAM = 0xFF
+
+# Byte input sends 9-bit literals so that the end marker can sit just above
+# the 256 byte values
+BYTE_LITERAL_BITS = 9
+BYTE_END_OF_STREAM = 0x100
+
+class AdaptiveHuffmanNode:
+    __slots__ = ('weight', 'parent', 'left', 'right', 'symbol', 'index')
+
+    def __init__(self, weight: int, parent: Optional['AdaptiveHuffmanNode'], symbol: Any = None):
+        self.weight = weight
+        self.parent = parent
+        self.left = None
+        self.right = None
+        self.symbol = symbol
+        self.index = 0
+
+class AdaptiveHuffmanTree:
+    """
+    FGK adaptive Huffman tree.
+
+    Nodes are kept in implicit-numbering order in self.order, root first, so a
+    smaller index means a higher node number. The sibling property (weights
+    non-increasing along self.order) is restored after every update by swapping
+    a node with the leader of its weight block before incrementing it.
+    """
+
+    def __init__(self):
+        self.root = AdaptiveHuffmanNode(0, None)
+        self.nyt = self.root
+        self.leaves: Dict[Any, AdaptiveHuffmanNode] = {}
+        self.order: List[AdaptiveHuffmanNode] = [self.root]
+
+    def code_for(self, node: AdaptiveHuffmanNode) -> Tuple[int, int]:
+        """Return (code value, code length) of the path from the root to node"""
+        value = 0
+        length = 0
+        while node.parent is not None:
+            if node is node.parent.right:
+                value |= 1 << length
+            length += 1
+            node = node.parent
+        return value, length
+
+    def update(self, symbol: Any) -> None:
+        node = self.leaves.get(symbol)
+        if node is None:
+            # Split NYT into a new NYT (lowest number) and a leaf for the symbol
+            old_nyt = self.nyt
+            leaf = AdaptiveHuffmanNode(0, old_nyt, symbol)
+            new_nyt = AdaptiveHuffmanNode(0, old_nyt)
+            old_nyt.left = new_nyt
+            old_nyt.right = leaf
+            leaf.index = len(self.order)
+            new_nyt.index = leaf.index + 1
+            self.order.append(leaf)
+            self.order.append(new_nyt)
+            self.leaves[symbol] = leaf
+            self.nyt = new_nyt
+            node = leaf
+
+        order = self.order
+        while node is not None:
+            leader_index = node.index
+            while leader_index > 0 and order[leader_index - 1].weight == node.weight:
+                leader_index -= 1
+            leader = order[leader_index]
+            if leader is not node and leader is not node.parent:
+                self._swap(node, leader)
+            node.weight += 1
+            node = node.parent
+
+    def _swap(self, first: AdaptiveHuffmanNode, second: AdaptiveHuffmanNode) -> None:
+        """Exchange two non-ancestral subtrees, including their node numbers"""
+        order = self.order
+        order[first.index], order[second.index] = second, first
+        first.index, second.index = second.index, first.index
+
+        first_parent, second_parent = first.parent, second.parent
+        first_is_left = first_parent.left is first
+        second_is_left = second_parent.left is second
+        if first_is_left:
+            first_parent.left = second
+        else:
+            first_parent.right = second
+        if second_is_left:
+            second_parent.left = first
+        else:
+            second_parent.right = first
+        first.parent, second.parent = second_parent, first_parent
+
+class AdaptiveHuffmanCoder(TextCoder):
+    """
+    Adaptive (FGK) Huffman coding implementation.
+
+    Encoder and decoder grow identical trees as symbols are seen, so the
+    message is coded in a single pass and no frequency table is transmitted.
+    A symbol's first occurrence is sent as the current NYT ("not yet
+    transmitted") code followed by its UTF-8 bytes; the stream ends with the
+    NYT code followed by the END_OF_STREAM byte.
+
+    bytes-like input is coded over the 256 byte values, with literals sent as
+    BYTE_LITERAL_BITS-bit values and BYTE_END_OF_STREAM as the end marker, and
+    decodes to bytes.
+
+    By default the encoded message is a string of '0'/'1' characters; with
+    packed=True it is bit-packed bytes.
+    """
+
+    def __init__(self, packed: bool = False):
+        super().__init__()
+        self.packed = packed
+        self.logger.info(f"Initialized Adaptive Huffman Coder with packed={packed}")
+
+    @property
+    def algorithm_name(self) -> str:
+        return "Adaptive Huffman"
+
+    def _write_symbol(self, tree: AdaptiveHuffmanTree, writer: BitWriter, char: Union[str, int]) -> None:
+        leaf = tree.leaves.get(char)
+        if leaf is not None:
+            writer.write(*tree.code_for(leaf))
+        else:
+            writer.write(*tree.code_for(tree.nyt))
+            if isinstance(char, int):
+                writer.write(char, BYTE_LITERAL_BITS)
+            else:
+                literal = char.encode('utf-8', 'surrogatepass')
+                writer.write(int.from_bytes(literal, 'big'), 8 * len(literal))
+        tree.update(char)
+
+    def iter_encode(self, chunks: Iterable[Union[str, BytesLike]]) -> Iterator[bytes]:
+        """
+        Encode an iterable of str (or bytes-like) chunks in one pass, yielding
+        packed bytes as soon as they are complete. The concatenation of
+        everything yielded is identical to encode(...) with packed=True.
+        """
+        tree = AdaptiveHuffmanTree()
+        writer = BitWriter()
+        binary = False
+        for chunk in chunks:
+            chunk = as_text_input(chunk)
+            binary = isinstance(chunk, bytes)
+            for char in chunk:
+                self._write_symbol(tree, writer, char)
+            completed = writer.pop_bytes()
+            if completed:
+                yield completed
+        writer.write(*tree.code_for(tree.nyt))
+        if binary:
+            writer.write(BYTE_END_OF_STREAM, BYTE_LITERAL_BITS)
+        else:
+            writer.write(END_OF_STREAM, 8)
+        yield writer.getvalue()
+
+    def encode(self, data: Union[str, BytesLike]) -> Tuple[Union[str, bytes], Dict]:
+        super().encode(data)
+        data = as_text_input(data)
+        packed_message = b''.join(self.iter_encode([data]))
+        # The final byte is zero-padded; the END_OF_STREAM marker bounds the payload
+        if self.packed:
+            encoded_message = packed_message
+            encoded_length = len(packed_message) * 8
+        else:
+            bits = format(int.from_bytes(packed_message, 'big'), f'0{len(packed_message) * 8}b')
+            encoded_message = bits
+            encoded_length = len(bits)
+
+        metadata = {
+            'original_length': len(data),
+            'encoded_length': encoded_length,
+            'packed': self.packed,
+            'input_type': 'bytes' if isinstance(data, bytes) else 'str'
+        }
+
+        self.logger.info(f"Encoded {metadata['original_length']} chars to {metadata['encoded_length']} bits.")
+        return encoded_message, metadata
+
+    def decode(self, encoded_data: Union[str, BytesLike], metadata: Dict) -> Union[str, bytes]:
+        super().decode(encoded_data, metadata)
+        binary = metadata.get('input_type') == 'bytes'
+        if isinstance(encoded_data, str):
+            encoded_data = bit_string_to_bytes(encoded_data)
+        if not encoded_data:
+            return b"" if binary else ""
+
+        reader = BitReader(encoded_data)
+        tree = AdaptiveHuffmanTree()
+        decoded = []
+        while True:
+            node = tree.root
+            while node.left is not None:
+                node = node.right if reader.read(1) else node.left
+            if node is tree.nyt and binary:
+                char = reader.read(BYTE_LITERAL_BITS)
+                if char == BYTE_END_OF_STREAM:
+                    break
+            elif node is tree.nyt:
+                lead = reader.read(8)
+                if lead == END_OF_STREAM:
+                    break
+                extra = 0 if lead < 0xC0 else 1 if lead < 0xE0 else 2 if lead < 0xF0 else 3
+                literal = bytes([lead]) + reader.read(8 * extra).to_bytes(extra, 'big')
+                char = literal.decode('utf-8', 'surrogatepass')
+            else:
+                char = node.symbol
+            decoded.append(char)
+            tree.update(char)
+
+        decoded_string = bytes(decoded) if binary else ''.join(decoded)
+        self.logger.info(f"Decoded {len(encoded_data)} bytes to {len(decoded_string)} symbols.")
+        return decoded_string
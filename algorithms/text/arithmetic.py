@@ -1,137 +1,241 @@
 # algorithms/text/arithmetic.py
-from collections import defaultdict
-from typing import Dict, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional, Union
 from core.base_coder import TextCoder
-from decimal import Decimal, getcontext
+from core.bitstream import BytesLike
+from core.statistics import SymbolStatistics, symbol_statistics
+from core.utils import as_text_input
+import math
+from decimal import MAX_EMAX, MIN_EMIN, Context, Decimal, localcontext
+from algorithms.text.range_coder import (CumulativeFrequencyTable, RangeDecoder, RangeEncoder, frequencies_from_bytes,
+                                         frequencies_to_bytes, quantize_frequencies)
+from algorithms.text.prefix_codes import from_code_points, to_code_points
+from algorithms.text.context_models import MODELS, create_model
+
+ENGINES = ('range', 'decimal')
+
+# Extra decimal digits beyond the message's information content, absorbing
+# rounding in the interval arithmetic
+PRECISION_GUARD_DIGITS = 10
 
 class ArithmeticCoder(TextCoder):
     """
     Arithmetic coding implementation based on the user-provided reference.
-    This version uses an iterative interval refinement approach to minimize precision errors.
+
+    Two engines are available:
+    - 'range' (default): a renormalizing 32-bit integer range coder that emits
+      bytes incrementally and handles messages of any length in O(n).
+    - 'decimal': the original iterative interval refinement on a single
+      high-precision Decimal, kept for illustration. It runs in a private
+      decimal.Context (never the process-global one), so coders can be used
+      from several threads at once. With auto_precision the context precision
+      grows with the information content of the message; otherwise the
+      message must fit in the configured precision.
+
+    The range engine takes a pluggable probability model (see
+    algorithms.text.context_models): 'static' ships the quantized order-0
+    frequencies in metadata, while the adaptive 'order0', 'order1' and
+    'order2' (PPM-style) models learn as they go and ship no table.
+
+    Both engines accept bytes-like input, coded over the 256 byte values and
+    decoded back to bytes.
+
+    With compact_metadata=True the frequency table is shipped as varint-coded
+    'frequency_table' bytes instead of a 'frequencies' dict.
     """
 
-    def __init__(self, precision: int = 50):
+    def __init__(self, precision: int = 50, engine: str = 'range', model: str = 'static',
+                 auto_precision: bool = True, compact_metadata: bool = False):
         super().__init__()
-        getcontext().prec = precision
-        self.logger.info(f"ArithmeticCoder initialized with precision {precision}")
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown arithmetic coding engine: {engine}")
+        if model not in MODELS:
+            raise ValueError(f"Unknown probability model: {model}")
+        if engine == 'decimal' and model != 'static':
+            raise ValueError("The decimal engine only supports the static model")
+        self.engine = engine
+        self.model = model
+        self.precision = precision
+        self.auto_precision = auto_precision
+        self.compact_metadata = compact_metadata
+        self.logger.info(f"ArithmeticCoder initialized with engine {engine}, model {model}, "
+                         f"precision {precision}, auto_precision {auto_precision}, "
+                         f"compact_metadata {compact_metadata}")
 
     @property
     def algorithm_name(self) -> str:
         return "Arithmetic"
 
-    def _get_probability_table(self, frequencies: Dict[str, int]) -> Dict[str, Decimal]:
-        """Calculates the probability table using Decimal for high precision."""
-        total_frequency = sum(frequencies.values())
-        if total_frequency == 0:
-            return {}
-
-        probability_table = {}
-        for key, value in frequencies.items():
-            probability_table[key] = Decimal(value) / Decimal(total_frequency)
-
-        return probability_table
-
-    def encode(self, data: str) -> Tuple[Decimal, Dict]:
+    def _get_cumulative_bounds(self, table: CumulativeFrequencyTable) -> List[Decimal]:
+        """Cumulative probability of every symbol boundary, ending with exactly 1."""
+        total = Decimal(table.total)
+        return [Decimal(start) / total for start in table.starts] + [Decimal(1)]
+
+    def _required_precision(self, frequencies: Dict[str, int]) -> int:
+        """
+        Decimal digits needed to keep the final interval distinguishable: the
+        message's information content in digits plus guard digits for rounding.
+        """
+        if not self.auto_precision:
+            return self.precision
+        total = sum(frequencies.values())
+        information_bits = sum(freq * math.log2(total / freq) for freq in frequencies.values())
+        return max(self.precision, math.ceil(information_bits / math.log2(10)) + PRECISION_GUARD_DIGITS)
+
+    def encode(self, data: Union[str, BytesLike],
+               stats: Optional[SymbolStatistics] = None) -> Tuple[Union[bytes, Decimal], Dict]:
         """Encodes a message using arithmetic encoding."""
         super().encode(data)
+        data = as_text_input(data)
+        if self.engine == 'range':
+            return self._encode_range(data, stats)
+        return self._encode_decimal(data, stats)
+
+    @staticmethod
+    def _join(symbols: List[Any], metadata: Dict) -> Union[str, bytes]:
+        """Reassemble decoded symbols into the type that was encoded."""
+        if metadata.get('input_type') == 'bytes':
+            return bytes(symbols)
+        return "".join(symbols)
+
+    def _store_frequencies(self, metadata: Dict, frequencies: Dict[Any, int]) -> None:
+        """Record the frequency table as a dict or, with compact_metadata, as varint bytes."""
+        if self.compact_metadata:
+            metadata['frequency_table'] = frequencies_to_bytes(to_code_points(frequencies))
+        else:
+            metadata['frequencies'] = dict(frequencies)
+
+    @staticmethod
+    def _load_frequencies(metadata: Dict) -> Optional[Dict[Any, int]]:
+        """Read back the frequency table stored by _store_frequencies."""
+        if 'frequency_table' in metadata:
+            frequencies, _ = frequencies_from_bytes(metadata['frequency_table'])
+            return from_code_points(frequencies, as_str=metadata.get('input_type') != 'bytes')
+        return metadata.get('frequencies')
+
+    def _encode_decimal(self, data: Union[str, bytes], stats: Optional[SymbolStatistics] = None) -> Tuple[Decimal, Dict]:
+        """Encodes a message as a single Decimal inside a private decimal context."""
+        input_type = 'bytes' if isinstance(data, bytes) else 'str'
         if not data:
-            return Decimal(0), {"frequencies": {}}
+            return Decimal(0), {"frequencies": {}, "input_type": input_type}
 
-        frequencies = defaultdict(int)
-        for char in data:
-            frequencies[char] += 1
-        
-        self.logger.debug(f"Calculated frequencies: {dict(frequencies)}")
-        probability_table = self._get_probability_table(frequencies)
-        
-        # Sort symbols for consistent ordering
-        sorted_symbols = sorted(probability_table.keys())
-
-        stage_min = Decimal(0)
-        stage_max = Decimal(1)
-
-        for msg_term in data:
-            stage_domain = stage_max - stage_min
-            
-            temp_stage_min = stage_min
-            for symbol in sorted_symbols:
-                term_prob = probability_table[symbol]
-                cum_prob = temp_stage_min + term_prob * stage_domain
-                
-                if msg_term == symbol:
-                    stage_min = temp_stage_min
-                    stage_max = cum_prob
-                    break
-                temp_stage_min = cum_prob
-
-        encoded_value = (stage_min + stage_max) / 2
+        frequencies = symbol_statistics(data, stats).frequencies
+        self.logger.debug(f"Calculated frequencies: {frequencies}")
+        precision = self._required_precision(frequencies)
+        table = CumulativeFrequencyTable(frequencies)
+
+        with localcontext(Context(prec=precision, Emin=MIN_EMIN, Emax=MAX_EMAX)):
+            bounds = self._get_cumulative_bounds(table)
+
+            stage_min = Decimal(0)
+            stage_max = Decimal(1)
+
+            for msg_term in data:
+                stage_domain = stage_max - stage_min
+                index = table.index[msg_term]
+                stage_min, stage_max = (stage_min + bounds[index] * stage_domain,
+                                        stage_min + bounds[index + 1] * stage_domain)
+
+            encoded_value = (stage_min + stage_max) / 2
         self.logger.debug(f"Final range: ({stage_min}, {stage_max}), encoded value: {encoded_value}")
 
         metadata = {
-            'frequencies': dict(frequencies),
             'message_length': len(data),
             'original_length': len(data),
+            'precision': precision,
+            'input_type': input_type,
         }
+        self._store_frequencies(metadata, frequencies)
         
-        self.logger.info(f"Encoded {metadata['original_length']} chars to a Decimal.")
+        self.logger.info(f"Encoded {metadata['original_length']} chars to a Decimal with {precision} digits.")
         return encoded_value, metadata
 
-    def decode(self, encoded_data: Decimal, metadata: Dict) -> str:
-        """Decodes a message from a high-precision Decimal number."""
+    def decode(self, encoded_data: Union[BytesLike, Decimal], metadata: Dict) -> Union[str, bytes]:
+        """Decodes a message from range-coded bytes or a high-precision Decimal number."""
         super().decode(encoded_data, metadata)
-        if not metadata.get('frequencies'):
-            return ""
+        if metadata.get('engine') == 'range':
+            return self._decode_range(encoded_data, metadata)
+        return self._decode_decimal(encoded_data, metadata)
 
-        frequencies = metadata['frequencies']
+    def _decode_decimal(self, encoded_data: Decimal, metadata: Dict) -> Union[str, bytes]:
+        """Decodes a Decimal produced by _encode_decimal, using the same precision."""
+        frequencies = self._load_frequencies(metadata)
         message_length = metadata.get('message_length')
-        if not message_length:
-            return ""
+        if not frequencies or not message_length:
+            return self._join([], metadata)
 
-        probability_table = self._get_probability_table(frequencies)
-        sorted_symbols = sorted(probability_table.keys())
-        
+        precision = metadata.get('precision') or self._required_precision(frequencies)
+        table = CumulativeFrequencyTable(frequencies)
         decoded_msg = []
         encoded_value = encoded_data
 
-        stage_min = Decimal(0)
-        stage_max = Decimal(1)
-
-        for _ in range(message_length):
-            stage_domain = stage_max - stage_min
-            
-            temp_stage_min = stage_min
-            found_symbol = False
-            for symbol in sorted_symbols:
-                term_prob = probability_table[symbol]
-                cum_prob = temp_stage_min + term_prob * stage_domain
-                
-                # Check if encoded value falls into the current symbol's range
-                if temp_stage_min <= encoded_value < cum_prob:
-                    decoded_msg.append(symbol)
-                    stage_min = temp_stage_min
-                    stage_max = cum_prob
-                    found_symbol = True
-                    break
-                temp_stage_min = cum_prob
-
-            if not found_symbol:
-                # This can happen if the encoded_value is exactly the upper bound of the last interval
-                # due to floating point inaccuracies. In this case, we assume it's the last symbol.
-                last_symbol = sorted_symbols[-1]
-                decoded_msg.append(last_symbol)
-                self.logger.warning(f"Encoded value was at the boundary. Fallback to last symbol '{last_symbol}'.")
-                
-                # We need to update the interval to continue decoding correctly
-                temp_stage_min = stage_min
+        with localcontext(Context(prec=precision, Emin=MIN_EMIN, Emax=MAX_EMAX)):
+            bounds = self._get_cumulative_bounds(table)
+
+            stage_min = Decimal(0)
+            stage_max = Decimal(1)
+
+            for _ in range(message_length):
                 stage_domain = stage_max - stage_min
-                for symbol in sorted_symbols:
-                    term_prob = probability_table[symbol]
-                    cum_prob = temp_stage_min + term_prob * stage_domain
-                    if symbol == last_symbol:
-                        stage_min = temp_stage_min
-                        stage_max = cum_prob
-                        break
-                    temp_stage_min = cum_prob
+
+                # Binary search for the last symbol whose lower bound is <= encoded_value,
+                # evaluating bounds with exactly the encoder's expression
+                lo, hi = 0, len(table.symbols) - 1
+                while lo < hi:
+                    mid = (lo + hi + 1) // 2
+                    if stage_min + bounds[mid] * stage_domain <= encoded_value:
+                        lo = mid
+                    else:
+                        hi = mid - 1
+
+                symbol = table.symbols[lo]
+                new_min = stage_min + bounds[lo] * stage_domain
+                new_max = stage_min + bounds[lo + 1] * stage_domain
+                if not encoded_value < new_max:
+                    # This can happen if the encoded_value is exactly the upper bound of the last interval
+                    # due to floating point inaccuracies. In this case, we assume it's the last symbol.
+                    self.logger.warning(f"Encoded value was at the boundary. Fallback to last symbol '{symbol}'.")
+                decoded_msg.append(symbol)
+                stage_min, stage_max = new_min, new_max
 
         self.logger.info(f"Decoded Decimal to {len(decoded_msg)} chars.")
-        return "".join(decoded_msg)
+        return self._join(decoded_msg, metadata)
+
+    def _encode_range(self, data: Union[str, bytes], stats: Optional[SymbolStatistics] = None) -> Tuple[bytes, Dict]:
+        """Encodes a message with the integer range coder and the configured model."""
+        binary = isinstance(data, bytes)
+        metadata = {'engine': 'range', 'model': self.model, 'input_type': 'bytes' if binary else 'str'}
+        frequencies = None
+        if self.model == 'static':
+            frequencies = quantize_frequencies(symbol_statistics(data, stats).frequencies)
+            self.logger.debug(f"Quantized frequencies: {frequencies}")
+            self._store_frequencies(metadata, frequencies)
+
+        model = create_model(self.model, frequencies, as_str=not binary)
+        encoder = RangeEncoder()
+        for char in data:
+            model.encode_symbol(encoder, char)
+        encoded = encoder.finish() if data else b''
+
+        metadata.update({
+            'message_length': len(data),
+            'original_length': len(data),
+            'encoded_length': len(encoded),
+        })
+
+        self.logger.info(f"Encoded {metadata['original_length']} chars to {metadata['encoded_length']} bytes.")
+        return encoded, metadata
+
+    def _decode_range(self, encoded_data: BytesLike, metadata: Dict) -> Union[str, bytes]:
+        """Decodes range-coded bytes produced by _encode_range."""
+        model_name = metadata.get('model', 'static')
+        frequencies = self._load_frequencies(metadata)
+        message_length = metadata.get('message_length')
+        if not message_length or (model_name == 'static' and not frequencies):
+            return self._join([], metadata)
+
+        model = create_model(model_name, frequencies, as_str=metadata.get('input_type') != 'bytes')
+        decoder = RangeDecoder(encoded_data)
+        decoded_msg = [model.decode_symbol(decoder) for _ in range(message_length)]
+
+        self.logger.info(f"Decoded {len(encoded_data)} bytes to {len(decoded_msg)} chars.")
+        return self._join(decoded_msg, metadata)
@@ -0,0 +1,269 @@
+# algorithms/text/block_parallel.py
+import inspect
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import IO, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+from core.base_coder import TextCoder
+from core.bitstream import BytesLike, decode_varint, encode_varint, read_varint
+from core.container import deserialize_value, serialize_value
+from core.factory import coder_factory
+from core.parallel import bounded_map
+from core.utils import as_text_input, iter_chunks
+
+# Marks a block-parallel stream; followed by a varint format version
+STREAM_MAGIC = b'ICTB'
+STREAM_VERSION = 1
+
+# Symbols per independently coded block
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+# Constructor option values a stream header may carry
+OPTION_TYPES = (type(None), bool, int, float, str)
+
+def _check_options(coder_class: Type[TextCoder], options: Dict) -> Dict:
+    """
+    Validate coder options (possibly read from an untrusted stream header):
+    each must be a named constructor parameter with a scalar value
+    """
+    if not isinstance(options, dict):
+        raise ValueError("Coder options must be a dict")
+    parameters = inspect.signature(coder_class).parameters
+    for name, value in options.items():
+        parameter = parameters.get(name) if isinstance(name, str) else None
+        if parameter is None or parameter.kind not in (parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY):
+            raise ValueError(f"{coder_class.__name__} has no option {name!r}")
+        if not isinstance(value, OPTION_TYPES):
+            raise ValueError(f"Option {name!r} must be None, bool, int, float or str, "
+                             f"not {type(value).__name__}")
+    return options
+
+def _encode_block(coder_class: Type[TextCoder], options: Dict, block: Union[str, bytes]) -> bytes:
+    """Worker: encode one block and serialize (encoded, metadata) as a frame payload"""
+    encoded, metadata = coder_class(**options).encode(block)
+    return serialize_value([encoded, metadata])
+
+def _decode_block(coder_class: Type[TextCoder], options: Dict, payload: bytes) -> Union[str, bytes]:
+    """Worker: decode one frame payload"""
+    (encoded, metadata), _ = deserialize_value(payload)
+    return coder_class(**options).decode(encoded, metadata)
+
+class BlockParallelCoder(TextCoder):
+    """
+    Block-parallel driver for any text coder.
+
+    The input is split into blocks of block_size symbols that are coded
+    independently in a ProcessPoolExecutor, so large inputs use every core.
+    The output is a framed stream:
+
+        b'ICTB' | varint version | varint header length | header
+        | (varint frame length | frame)* | varint 0
+
+    The header (a serialized dict) names the coder class and its constructor
+    options, and each frame holds one block's serialized (encoded, metadata)
+    pair, so the stream decodes without any side information. Frames are
+    produced and consumed in order with a bounded number of blocks in flight.
+
+    coder is a coder_factory text coder name (e.g. "Huffman") or registered
+    class; extra keyword arguments (scalar values only) are passed to its
+    constructor. The header records the registered name, and decoding only
+    resolves it through coder_factory and validates the options against the
+    constructor, so a stream cannot make the decoder import or call anything
+    else. max_workers=1 codes the blocks in-process.
+    """
+
+    def __init__(self, coder: Union[str, Type[TextCoder]] = "Huffman", block_size: int = DEFAULT_BLOCK_SIZE,
+                 max_workers: Optional[int] = None, max_in_flight: Optional[int] = None, **coder_options):
+        super().__init__()
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        self.coder = coder
+        self.block_size = block_size
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self.coder_options = coder_options
+        self.logger.info(f"Initialized Block-Parallel Coder with coder={coder}, block_size={block_size}, "
+                         f"max_workers={max_workers}, options={coder_options}")
+
+    @property
+    def algorithm_name(self) -> str:
+        return "Block-Parallel"
+
+    def _coder(self) -> Tuple[str, Type[TextCoder]]:
+        """The coder's registered name and class, with the options checked against it"""
+        if isinstance(self.coder, str):
+            name, coder_class = self.coder, coder_factory.get_text_coder_class(self.coder)
+        else:
+            name, coder_class = coder_factory.get_text_coder_name(self.coder), self.coder
+        _check_options(coder_class, self.coder_options)
+        return name, coder_class
+
+    def _executor(self, blocks: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+        """Process pool for the block workers; None (code in-process) when there is nothing to parallelize"""
+        if self.max_workers == 1 or (blocks is not None and blocks <= 1):
+            return None
+        return ProcessPoolExecutor(self.max_workers)
+
+    def _iter_blocks(self, source: Union[str, BytesLike, IO, Iterable]) -> Iterator[Union[str, bytes]]:
+        """Split in-memory data, a file-like object or an iterable of chunks into blocks"""
+        block_size = self.block_size
+        if isinstance(source, (str, bytes, bytearray, memoryview)):
+            data = as_text_input(source)
+            for start in range(0, len(data), block_size):
+                yield data[start:start + block_size]
+            return
+
+        pending: List[Union[str, bytes]] = []
+        pending_length = 0
+        for chunk in iter_chunks(source, block_size):
+            chunk = as_text_input(chunk)
+            pending.append(chunk)
+            pending_length += len(chunk)
+            if pending_length >= block_size:
+                buffered = chunk[:0].join(pending)
+                whole = len(buffered) - len(buffered) % block_size
+                for start in range(0, whole, block_size):
+                    yield buffered[start:start + block_size]
+                pending = [buffered[whole:]]
+                pending_length = len(pending[0])
+        if pending_length:
+            yield pending[0][:0].join(pending)
+
+    def iter_encode_stream(self, source: Union[str, BytesLike, IO, Iterable]) -> Iterator[bytes]:
+        """Encode data or a stream of chunks block by block, yielding the framed stream piece by piece"""
+        name, coder_class = self._coder()
+        header = serialize_value({'coder': name, 'options': self.coder_options, 'block_size': self.block_size})
+        yield STREAM_MAGIC + encode_varint(STREAM_VERSION) + encode_varint(len(header)) + header
+
+        blocks = None
+        if isinstance(source, (str, bytes, bytearray, memoryview)):
+            blocks = -(-len(source) // self.block_size)
+        encode_block = partial(_encode_block, coder_class, self.coder_options)
+        executor = self._executor(blocks)
+        try:
+            for payload in bounded_map(encode_block, self._iter_blocks(source), executor, self.max_in_flight):
+                yield encode_varint(len(payload)) + payload
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        yield encode_varint(0)
+
+    def _parse_header(self, read_varint_fn, read_bytes) -> Tuple[Type[TextCoder], Dict]:
+        if read_bytes(len(STREAM_MAGIC)) != STREAM_MAGIC:
+            raise ValueError("Not a block-parallel stream")
+        version = read_varint_fn()
+        if version is None or version > STREAM_VERSION:
+            raise ValueError(f"Unsupported block-parallel stream version {version}")
+        header_length = read_varint_fn()
+        header, _ = deserialize_value(read_bytes(header_length))
+        if not isinstance(header, dict) or not isinstance(header.get('coder'), str):
+            raise ValueError("Malformed block-parallel stream header")
+        coder_class = coder_factory.get_text_coder_class(header['coder'])
+        return coder_class, _check_options(coder_class, header.get('options', {}))
+
+    def iter_decode_stream(self, source: BinaryIO) -> Iterator[Union[str, bytes]]:
+        """Decode a framed stream from a binary file object, yielding one decoded block at a time"""
+        def read_bytes(length: int) -> bytes:
+            data = source.read(length)
+            if len(data) != length:
+                raise ValueError("Truncated block-parallel stream")
+            return data
+
+        coder_class, options = self._parse_header(lambda: read_varint(source), read_bytes)
+
+        def iter_frames() -> Iterator[bytes]:
+            while True:
+                frame_length = read_varint(source)
+                if frame_length is None:
+                    raise ValueError("Block-parallel stream ended without a terminating frame")
+                if frame_length == 0:
+                    return
+                yield read_bytes(frame_length)
+
+        decode_block = partial(_decode_block, coder_class, options)
+        executor = self._executor()
+        try:
+            yield from bounded_map(decode_block, iter_frames(), executor, self.max_in_flight)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    def encode(self, data: Union[str, BytesLike]) -> Tuple[bytes, Dict]:
+        super().encode(data)
+        data = as_text_input(data)
+        encoded = b''.join(self.iter_encode_stream(data))
+        metadata = {
+            'coder': self.coder if isinstance(self.coder, str) else self.coder.__name__,
+            'block_size': self.block_size,
+            'blocks': -(-len(data) // self.block_size),
+            'original_length': len(data),
+            'encoded_length': len(encoded),
+            'input_type': 'bytes' if isinstance(data, bytes) else 'str'
+        }
+        self.logger.info(f"Encoded {metadata['original_length']} symbols in {metadata['blocks']} blocks "
+                         f"to {metadata['encoded_length']} bytes.")
+        return encoded, metadata
+
+    def decode(self, encoded_data: BytesLike, metadata: Dict) -> Union[str, bytes]:
+        super().decode(encoded_data, metadata)
+        buffer = memoryview(encoded_data).cast('B')
+        position = 0
+
+        def read_bytes(length: int) -> bytes:
+            nonlocal position
+            if position + length > len(buffer):
+                raise ValueError("Truncated block-parallel stream")
+            position += length
+            return bytes(buffer[position - length:position])
+
+        def read_varint_fn() -> int:
+            nonlocal position
+            value, position = decode_varint(buffer, position)
+            return value
+
+        coder_class, options = self._parse_header(read_varint_fn, read_bytes)
+
+        def iter_frames() -> Iterator[bytes]:
+            while True:
+                frame_length = read_varint_fn()
+                if frame_length == 0:
+                    return
+                yield read_bytes(frame_length)
+
+        decode_block = partial(_decode_block, coder_class, options)
+        executor = self._executor(metadata.get('blocks'))
+        try:
+            blocks = list(bounded_map(decode_block, iter_frames(), executor, self.max_in_flight))
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        empty = b"" if metadata.get('input_type') == 'bytes' else ""
+        decoded = blocks[0][:0].join(blocks) if blocks else empty
+        self.logger.info(f"Decoded {len(blocks)} blocks to {len(decoded)} symbols.")
+        return decoded
+
+    def encode_stream(self, source: Union[IO, Iterable], sink: BinaryIO) -> Dict:
+        """Encode a text or binary stream into a binary sink, returning summary metadata"""
+        self.logger.info(f"Stream-encoding data with {self.algorithm_name}, block_size={self.block_size}")
+        blocks = -2  # neither the header nor the terminating frame is a block
+        encoded_length = 0
+        for piece in self.iter_encode_stream(source):
+            sink.write(piece)
+            blocks += 1
+            encoded_length += len(piece)
+
+        self.logger.info(f"Stream-encoded {blocks} blocks to {encoded_length} bytes.")
+        return {'blocks': blocks, 'block_size': self.block_size, 'encoded_length': encoded_length}
+
+    def decode_stream(self, source: BinaryIO, sink: IO) -> Dict:
+        """Decode a framed stream into a text (or binary) sink, returning summary metadata"""
+        self.logger.info(f"Stream-decoding data with {self.algorithm_name}")
+        blocks = 0
+        original_length = 0
+        for block in self.iter_decode_stream(source):
+            sink.write(block)
+            blocks += 1
+            original_length += len(block)
+
+        self.logger.info(f"Stream-decoded {blocks} blocks to {original_length} symbols.")
+        return {'blocks': blocks, 'original_length': original_length}
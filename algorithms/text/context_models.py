@@ -0,0 +1,207 @@
+# algorithms/text/context_models.py
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from algorithms.text.range_coder import (MAX_TOTAL, CumulativeFrequencyTable, FenwickTree,
+                                         RangeDecoder, RangeEncoder)
+
+# Symbols never seen by any context are sent as a literal code point in
+# three uniform 7-bit pieces (21 bits covers all of Unicode)
+LITERAL_PIECES = 3
+LITERAL_PIECE_BITS = 7
+
+class ProbabilityModel(ABC):
+    """
+    Probability model driving the range coder.
+    A model codes one symbol at a time and may emit several range-coder
+    events per symbol (e.g. escapes); adaptive models update themselves after
+    every symbol so that encoder and decoder stay in lockstep.
+    """
+
+    @abstractmethod
+    def encode_symbol(self, encoder: RangeEncoder, symbol: Any) -> None:
+        pass
+
+    @abstractmethod
+    def decode_symbol(self, decoder: RangeDecoder) -> Any:
+        pass
+
+class StaticModel(ProbabilityModel):
+    """Static order-0 model built from known (quantized) frequencies"""
+
+    def __init__(self, frequencies: Dict[Any, int]):
+        self.table = CumulativeFrequencyTable(frequencies)
+
+    def encode_symbol(self, encoder: RangeEncoder, symbol: Any) -> None:
+        start, size = self.table.intervals[symbol]
+        encoder.encode(start, size, self.table.total)
+
+    def decode_symbol(self, decoder: RangeDecoder) -> Any:
+        symbol, start, size = self.table.find(decoder.get_freq(self.table.total))
+        decoder.decode(start, size)
+        return symbol
+
+def encode_literal(encoder: RangeEncoder, symbol: Any) -> None:
+    """Code a symbol's code point with a flat distribution (order -1)"""
+    code_point = ord(symbol) if isinstance(symbol, str) else symbol
+    for piece in reversed(range(LITERAL_PIECES)):
+        encoder.encode((code_point >> (piece * LITERAL_PIECE_BITS)) & ((1 << LITERAL_PIECE_BITS) - 1),
+                       1, 1 << LITERAL_PIECE_BITS)
+
+def decode_literal(decoder: RangeDecoder, as_str: bool = True) -> Any:
+    code_point = 0
+    for _ in range(LITERAL_PIECES):
+        value = decoder.get_freq(1 << LITERAL_PIECE_BITS)
+        decoder.decode(value, 1)
+        code_point = (code_point << LITERAL_PIECE_BITS) | value
+    return chr(code_point) if as_str else code_point
+
+class AdaptiveOrder0Model(ProbabilityModel):
+    """
+    Adaptive order-0 model over a growing alphabet.
+    Counts live in a Fenwick tree; slot 0 is the escape symbol, whose count is
+    the number of distinct symbols seen (PPM method C). Escaped symbols are
+    sent as literals and then get a slot of their own.
+    """
+
+    def __init__(self, as_str: bool = True, capacity: int = 64):
+        self.as_str = as_str
+        self.tree = FenwickTree(capacity)
+        self.tree.add(0, 1)
+        self.slots: Dict[Any, int] = {}
+        self.symbols: List[Any] = [None]
+
+    def encode_symbol(self, encoder: RangeEncoder, symbol: Any) -> None:
+        slot = self.slots.get(symbol)
+        if slot is None:
+            self._encode_slot(encoder, 0)
+            encode_literal(encoder, symbol)
+        else:
+            self._encode_slot(encoder, slot)
+        self.update(symbol)
+
+    def decode_symbol(self, decoder: RangeDecoder) -> Any:
+        slot, start = self.tree.find(decoder.get_freq(self.tree.total))
+        decoder.decode(start, self.tree.count(slot))
+        symbol = decode_literal(decoder, self.as_str) if slot == 0 else self.symbols[slot]
+        self.update(symbol)
+        return symbol
+
+    def _encode_slot(self, encoder: RangeEncoder, slot: int) -> None:
+        encoder.encode(self.tree.prefix_sum(slot), self.tree.count(slot), self.tree.total)
+
+    def update(self, symbol: Any) -> None:
+        slot = self.slots.get(symbol)
+        if slot is None:
+            slot = len(self.symbols)
+            if slot >= self.tree.size:
+                self._rebuild(self.tree.size * 2)
+            self.slots[symbol] = slot
+            self.symbols.append(symbol)
+            if slot > 1:
+                self.tree.add(0, 1)
+        self.tree.add(slot, 1)
+        if self.tree.total >= MAX_TOTAL:
+            self._rebuild(self.tree.size, halve=True)
+
+    def _rebuild(self, capacity: int, halve: bool = False) -> None:
+        counts = [self.tree.count(i) for i in range(len(self.symbols))]
+        if halve:
+            counts = [counts[0]] + [max(1, count // 2) for count in counts[1:]]
+        self.tree = FenwickTree(capacity)
+        for slot, count in enumerate(counts):
+            self.tree.add(slot, count)
+
+class _ContextStats:
+    """Symbol counts seen after one particular context"""
+    __slots__ = ('counts', 'total')
+
+    def __init__(self):
+        self.counts: Dict[Any, int] = {}
+        self.total = 0
+
+    def add(self, symbol: Any) -> None:
+        self.counts[symbol] = self.counts.get(symbol, 0) + 1
+        self.total += 1
+        if self.total + len(self.counts) >= MAX_TOTAL:
+            self.counts = {s: max(1, c // 2) for s, c in self.counts.items()}
+            self.total = sum(self.counts.values())
+
+class ContextModel(ProbabilityModel):
+    """
+    PPM-style order-k context model.
+    The symbol is first coded in the context of the previous k symbols; if it
+    has not been seen there an escape (weighted by the number of distinct
+    symbols in the context) drops to order k-1, and so on down to an adaptive
+    order-0 model, which escapes to literals.
+    """
+
+    def __init__(self, order: int, as_str: bool = True):
+        self.order = order
+        self.order0 = AdaptiveOrder0Model(as_str)
+        self.contexts: List[Dict[Tuple, _ContextStats]] = [{} for _ in range(order + 1)]
+        self.history: deque = deque(maxlen=order)
+
+    def _active_contexts(self) -> List[Optional[_ContextStats]]:
+        """Stats of the current contexts, from the highest usable order down to 1"""
+        history = tuple(self.history)
+        return [self.contexts[k].get(history[len(history) - k:])
+                for k in range(min(self.order, len(history)), 0, -1)]
+
+    def encode_symbol(self, encoder: RangeEncoder, symbol: Any) -> None:
+        for stats in self._active_contexts():
+            if stats is None:
+                continue  # context never seen: nothing to escape from
+            start = 0
+            for other, count in stats.counts.items():
+                if other == symbol:
+                    encoder.encode(start, count, stats.total + len(stats.counts))
+                    self._update(symbol)
+                    return
+                start += count
+            encoder.encode(stats.total, len(stats.counts), stats.total + len(stats.counts))
+        self.order0.encode_symbol(encoder, symbol)
+        self._update(symbol, order0_updated=True)
+
+    def decode_symbol(self, decoder: RangeDecoder) -> Any:
+        for stats in self._active_contexts():
+            if stats is None:
+                continue
+            target = decoder.get_freq(stats.total + len(stats.counts))
+            if target < stats.total:
+                start = 0
+                for symbol, count in stats.counts.items():
+                    if target < start + count:
+                        decoder.decode(start, count)
+                        self._update(symbol)
+                        return symbol
+                    start += count
+            decoder.decode(stats.total, len(stats.counts))
+        symbol = self.order0.decode_symbol(decoder)
+        self._update(symbol, order0_updated=True)
+        return symbol
+
+    def _update(self, symbol: Any, order0_updated: bool = False) -> None:
+        if not order0_updated:
+            self.order0.update(symbol)
+        history = tuple(self.history)
+        for k in range(1, min(self.order, len(history)) + 1):
+            key = history[len(history) - k:]
+            stats = self.contexts[k].get(key)
+            if stats is None:
+                stats = self.contexts[k][key] = _ContextStats()
+            stats.add(symbol)
+        self.history.append(symbol)
+
+# Model names accepted by ArithmeticCoder(model=...)
+MODELS = ('static', 'order0', 'order1', 'order2')
+
+def create_model(name: str, frequencies: Dict[Any, int] = None, as_str: bool = True) -> ProbabilityModel:
+    """Instantiate a probability model by name"""
+    if name == 'static':
+        return StaticModel(frequencies)
+    if name == 'order0':
+        return AdaptiveOrder0Model(as_str)
+    if name in ('order1', 'order2'):
+        return ContextModel(int(name[-1]), as_str)
+    raise ValueError(f"Unknown probability model: {name}")
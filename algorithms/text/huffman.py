@@ -1,7 +1,24 @@
 # algorithms/text/huffman.py
-from collections import Counter
-from typing import Dict, Tuple, Any, Optional
+import heapq
+from functools import lru_cache
+from typing import IO, BinaryIO, Dict, Iterable, Iterator, List, Tuple, Any, Optional, Union
 from core.base_coder import TextCoder
+from core.bitstream import BitWriter, BytesLike, encode_varint, decode_varint, read_varint
+from core.statistics import SymbolStatistics, symbol_statistics
+from core.utils import as_text_input, iter_chunks
+from algorithms.text.prefix_codes import (PrefixDecodeTable, bit_string_to_bytes, canonical_codes,
+                                          code_lengths_from_bytes, code_lengths_to_bytes, codes_from_bit_strings,
+                                          from_code_points, length_limited_code_lengths, to_code_points)
+
+# Number of symbols converted to bits per step when packing, bounding the
+# size of the intermediate '0'/'1' string regardless of input length
+PACK_CHUNK_SIZE = 1 << 16
+
+# Characters per independently coded block in the streaming API
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+# Packed format flag: the symbols are byte values and decode to bytes
+FLAG_BYTES = 0x01
 
 class HuffmanNode:
     def __init__(self, char: Optional[str], freq: int):
@@ -11,81 +28,240 @@ class HuffmanNode:
         self.right = None
 
 class HuffmanCoder(TextCoder):
-    """Huffman coding implementation"""
+    """
+    Huffman coding implementation.
+
+    The tree is built with a binary heap, ties broken by symbol order, and the
+    resulting code lengths are turned into canonical codes, so the codes depend
+    only on the frequencies. max_code_length limits code lengths using the
+    package-merge algorithm.
+
+    By default the encoded message is a string of '0'/'1' characters. With
+    packed=True it is a self-contained bytes object: a flags byte, the varint
+    message length, a canonical code-length table and the bit-packed payload.
+
+    bytes, bytearray and memoryview input is coded over the 256 byte values
+    and decodes back to bytes.
+
+    With compact_metadata=True the metadata carries no 'codes' or
+    'frequencies' dicts; the string format gets a 'code_table' bytes header
+    (the canonical code lengths) instead, and the packed format needs none.
+    """
+    
+    def __init__(self, packed: bool = False, max_code_length: Optional[int] = None,
+                 compact_metadata: bool = False):
+        super().__init__()
+        self.packed = packed
+        self.max_code_length = max_code_length
+        self.compact_metadata = compact_metadata
+        self.logger.info(f"Initialized Huffman Coder with packed={packed}, max_code_length={max_code_length}, "
+                         f"compact_metadata={compact_metadata}")
     
     @property
     def algorithm_name(self) -> str:
         return "Huffman"
     
     def _build_tree(self, frequencies: Dict[str, int]) -> HuffmanNode:
-        nodes = [HuffmanNode(char, freq) for char, freq in frequencies.items()]
+        # Heap entries are (freq, tie_breaker, node): leaves are numbered in symbol
+        # order and merged nodes after them, so equal frequencies always pop in
+        # the same order no matter how the frequency dict was populated
+        heap = [(freq, order, HuffmanNode(char, freq))
+                for order, (char, freq) in enumerate(sorted(frequencies.items()))]
+        heapq.heapify(heap)
+        order = len(heap)
         
-        while len(nodes) > 1:
-            nodes = sorted(nodes, key=lambda x: x.freq)
-            left = nodes.pop(0)
-            right = nodes.pop(0)
+        while len(heap) > 1:
+            left_freq, _, left = heapq.heappop(heap)
+            right_freq, _, right = heapq.heappop(heap)
             
-            merged = HuffmanNode(None, left.freq + right.freq)
+            merged = HuffmanNode(None, left_freq + right_freq)
             merged.left = left
             merged.right = right
-            nodes.append(merged)
+            heapq.heappush(heap, (merged.freq, order, merged))
+            order += 1
         
         self.logger.debug("Built Huffman tree")
-        return nodes[0] if nodes else None
+        return heap[0][2] if heap else None
     
-    def _generate_codes(self, node: HuffmanNode, code: str = '', codes: Dict = None) -> Dict:
-        if codes is None:
-            codes = {}
+    def _code_lengths(self, frequencies: Dict[str, int]) -> Dict[str, int]:
+        """Code length per symbol, from the tree or from package-merge when limited"""
+        if self.max_code_length is not None:
+            return length_limited_code_lengths(frequencies, self.max_code_length)
         
-        if node:
-            if node.char:  # Leaf node
-                codes[node.char] = code if code else "0"
+        lengths = {}
+        stack = [(self._build_tree(frequencies), 0)]
+        while stack:
+            node, depth = stack.pop()
+            if node.left is None:  # Leaf node
+                lengths[node.char] = max(depth, 1)
             else:
-                self._generate_codes(node.left, code + '0', codes)
-                self._generate_codes(node.right, code + '1', codes)
-        
-        return codes
+                stack.append((node.left, depth + 1))
+                stack.append((node.right, depth + 1))
+        return lengths
     
-    def encode(self, data: str) -> Tuple[str, Dict]:
+    def encode(self, data: Union[str, BytesLike],
+               stats: Optional[SymbolStatistics] = None) -> Tuple[Union[str, bytes], Dict]:
         super().encode(data)
+        data = as_text_input(data)
+        input_type = 'bytes' if isinstance(data, bytes) else 'str'
         if not data:
-            return "", {"codes": {}, "tree_structure": None}
+            if self.packed:
+                return self._pack(data, {}), {"codes": {}, "original_length": 0, "input_type": input_type}
+            return "", {"codes": {}, "tree_structure": None, "input_type": input_type}
         
-        frequencies = Counter(data)
+        frequencies = symbol_statistics(data, stats).frequencies
         self.logger.debug(f"Calculated frequencies: {dict(frequencies)}")
-        root = self._build_tree(frequencies)
-        codes = self._generate_codes(root)
+        lengths = self._code_lengths(frequencies)
+        codes = {char: format(value, f'0{length}b')
+                 for char, (value, length) in canonical_codes(lengths).items()}
         self.logger.debug(f"Generated Huffman codes: {codes}")
         
-        encoded_message = ''.join(codes.get(char, '') for char in data)
+        if self.packed:
+            encoded_message = self._pack(data, lengths)
+            encoded_length = len(encoded_message) * 8
+        else:
+            encoded_message = ''.join([codes[char] for char in data])
+            encoded_length = len(encoded_message)
         
         metadata = {
-            'codes': codes,
-            'frequencies': dict(frequencies),
             'original_length': len(data),
-            'encoded_length': len(encoded_message)
+            'encoded_length': encoded_length,
+            'packed': self.packed,
+            'input_type': input_type
         }
+        if not self.compact_metadata:
+            metadata.update({'codes': codes, 'frequencies': dict(frequencies)})
+        elif not self.packed:
+            metadata['code_table'] = code_lengths_to_bytes(to_code_points(lengths))
         
         self.logger.info(f"Encoded {metadata['original_length']} chars to {metadata['encoded_length']} bits.")
         return encoded_message, metadata
     
-    def decode(self, encoded_data: str, metadata: Dict) -> str:
+    def _pack(self, data: Union[str, bytes], lengths: Dict[Any, int]) -> bytes:
+        """Serialize the code-length header followed by the bit-packed payload"""
+        binary = isinstance(data, bytes)
+        header = bytearray([FLAG_BYTES if binary else 0])
+        header += encode_varint(len(data))
+        header += code_lengths_to_bytes(to_code_points(lengths))
+        
+        bit_strings = {char: format(value, f'0{length}b')
+                       for char, (value, length) in canonical_codes(lengths).items()}
+        writer = BitWriter()
+        for start in range(0, len(data), PACK_CHUNK_SIZE):
+            bits = ''.join([bit_strings[char] for char in data[start:start + PACK_CHUNK_SIZE]])
+            writer.write(int(bits, 2), len(bits))
+        
+        self.logger.debug(f"Packed header of {len(header)} bytes and payload of {writer.bit_length} bits")
+        return bytes(header) + writer.getvalue()
+    
+    def _unpack(self, encoded_data: BytesLike) -> Union[str, bytes]:
+        """Decode a packed message produced by _pack"""
+        buffer = memoryview(encoded_data).cast('B')
+        binary = bool(buffer[0] & FLAG_BYTES)
+        message_length, offset = decode_varint(buffer, 1)
+        lengths, offset = code_lengths_from_bytes(buffer, offset)
+        if message_length == 0:
+            return b"" if binary else ""
+        
+        codes = canonical_codes(from_code_points(lengths, as_str=not binary))
+        table = _decode_table(tuple(sorted((char, value, length) for char, (value, length) in codes.items())))
+        decoded = table.decode(buffer[offset:], count=message_length)
+        return bytes(decoded) if binary else ''.join(decoded)
+    
+    def decode(self, encoded_data: Union[str, BytesLike], metadata: Dict) -> Union[str, bytes]:
         super().decode(encoded_data, metadata)
-        if not encoded_data or not metadata.get('codes'):
-            return ""
+        if isinstance(encoded_data, (bytes, bytearray, memoryview)):
+            decoded_string = self._unpack(encoded_data)
+            self.logger.info(f"Decoded {len(encoded_data)} packed bytes to {len(decoded_string)} chars.")
+            return decoded_string
         
-        # Rebuild tree from frequencies
-        frequencies = metadata['frequencies']
-        root = self._build_tree(frequencies)
+        binary = metadata.get('input_type') == 'bytes'
+        if 'code_table' in metadata:
+            lengths, _ = code_lengths_from_bytes(metadata['code_table'])
+            codes = canonical_codes(from_code_points(lengths, as_str=not binary))
+        else:
+            codes = codes_from_bit_strings(metadata.get('codes') or {})
+        if not encoded_data or not codes:
+            return b"" if binary else ""
         
-        decoded = []
-        node = root
+        table = _decode_table(tuple(sorted((char, value, length) for char, (value, length) in codes.items())))
+        decoded = table.decode(bit_string_to_bytes(encoded_data), count=metadata.get('original_length'),
+                               bit_length=len(encoded_data))
+        
+        self.logger.info(f"Decoded {len(encoded_data)} bits to {len(decoded)} symbols.")
+        return bytes(decoded) if binary else ''.join(decoded)
+
+    def iter_encode_stream(self, source: Union[IO, Iterable[Union[str, BytesLike]]],
+                           block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[bytes]:
+        """
+        Encode a text or binary stream block by block, yielding framed blocks.
+        Each frame is a varint byte length followed by a packed block with its
+        own code table; a zero-length frame terminates the stream. Only one
+        block of input is buffered at a time.
+        """
+        pending: List[Union[str, bytes]] = []
+        pending_length = 0
+        for chunk in iter_chunks(source, block_size):
+            chunk = as_text_input(chunk)
+            pending.append(chunk)
+            pending_length += len(chunk)
+            if pending_length >= block_size:
+                buffered = chunk[:0].join(pending)
+                whole = len(buffered) - len(buffered) % block_size
+                for start in range(0, whole, block_size):
+                    yield self._frame(buffered[start:start + block_size])
+                pending = [buffered[whole:]]
+                pending_length = len(pending[0])
+        if pending_length:
+            yield self._frame(pending[0][:0].join(pending))
+        yield encode_varint(0)
+    
+    def encode_stream(self, source: Union[IO, Iterable[Union[str, BytesLike]]], sink: BinaryIO,
+                      block_size: int = DEFAULT_BLOCK_SIZE) -> Dict:
+        """Encode a text or binary stream into a binary sink, returning summary metadata"""
+        self.logger.info(f"Stream-encoding data with {self.algorithm_name}, block_size={block_size}")
+        blocks = -1  # the terminating frame is not a block
+        encoded_length = 0
+        for frame in self.iter_encode_stream(source, block_size):
+            sink.write(frame)
+            blocks += 1
+            encoded_length += len(frame)
         
-        for bit in encoded_data:
-            node = node.left if bit == '0' else node.right
-            if node and node.char:  # Leaf node
-                decoded.append(node.char)
-                node = root
+        self.logger.info(f"Stream-encoded {blocks} blocks to {encoded_length} bytes.")
+        return {'blocks': blocks, 'block_size': block_size, 'encoded_length': encoded_length}
+    
+    def iter_decode_stream(self, source: BinaryIO) -> Iterator[Union[str, bytes]]:
+        """Decode framed blocks from a binary stream, yielding one str (or bytes) per block"""
+        while True:
+            frame_length = read_varint(source)
+            if frame_length is None:
+                raise ValueError("Huffman stream ended without a terminating frame")
+            if frame_length == 0:
+                return
+            frame = source.read(frame_length)
+            if len(frame) != frame_length:
+                raise ValueError("Truncated Huffman stream frame")
+            yield self._unpack(frame)
+    
+    def decode_stream(self, source: BinaryIO, sink: IO) -> Dict:
+        """Decode a framed stream into a text (or, for binary input, binary) sink, returning summary metadata"""
+        self.logger.info(f"Stream-decoding data with {self.algorithm_name}")
+        blocks = 0
+        original_length = 0
+        for block in self.iter_decode_stream(source):
+            sink.write(block)
+            blocks += 1
+            original_length += len(block)
         
-        self.logger.info(f"Decoded {len(encoded_data)} bits to {len(decoded)} chars.")
-        return ''.join(decoded)
+        self.logger.info(f"Stream-decoded {blocks} blocks to {original_length} chars.")
+        return {'blocks': blocks, 'original_length': original_length}
+    
+    def _frame(self, block: Union[str, bytes]) -> bytes:
+        packed = self._pack(block, self._code_lengths(SymbolStatistics(block).frequencies))
+        return encode_varint(len(packed)) + packed
+
+@lru_cache(maxsize=32)
+def _decode_table(code_items: Tuple[Tuple[Any, int, int], ...]) -> PrefixDecodeTable:
+    """Build (and memoize) the lookup table for a code, so replaying many
+    payloads that share a table does not rebuild it per call"""
+    return PrefixDecodeTable({symbol: (value, length) for symbol, value, length in code_items})
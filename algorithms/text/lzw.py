@@ -1,65 +1,298 @@
 # algorithms/text/lzw.py
-from typing import Dict, Tuple, Any, List
+from collections import OrderedDict
+from typing import Dict, Tuple, Any, Iterator, List, Optional, Union
 from core.base_coder import TextCoder
+from core.bitstream import BitReader, BitWriter, BytesLike
+from core.utils import as_text_input
+
+# Codes start at 9 bits and widen as the dictionary grows, as in GIF and compress
+MIN_CODE_WIDTH = 9
+
+# Bits reserved for the next symbol when packing a (prefix code, symbol) dictionary key
+SYMBOL_BITS = 8
+
+# Under the 'reset' policy code 256 is reserved to tell the decoder to start over
+CLEAR_CODE = 256
+
+POLICIES = ('freeze', 'reset', 'lru')
+
+class LeafLRU:
+    """
+    Least-recently-used tracking of evictable dictionary entries.
+    Only leaves (entries that are not the prefix of another entry) are
+    candidates, so evicting one never breaks a longer entry. Encoder and
+    decoder apply the same touch/add/evict sequence, so they pick the same
+    victims without any side information.
+    """
+
+    def __init__(self, first_free: int):
+        self.first_free = first_free
+        self.leaves: 'OrderedDict[int, None]' = OrderedDict()
+        self.parent: Dict[int, int] = {}
+        self.children: Dict[int, int] = {}
+
+    def touch(self, code: int) -> None:
+        if code in self.leaves:
+            self.leaves.move_to_end(code)
+
+    def victim(self, exclude: int) -> Optional[int]:
+        """Least recently used leaf other than exclude, or None if there is none"""
+        for code in self.leaves:
+            if code != exclude:
+                return code
+        return None
+
+    def add(self, code: int, parent: int) -> None:
+        self.parent[code] = parent
+        self.children[parent] = self.children.get(parent, 0) + 1
+        self.leaves.pop(parent, None)
+        self.leaves[code] = None
+
+    def remove(self, code: int) -> None:
+        del self.leaves[code]
+        parent = self.parent.pop(code)
+        self.children[parent] -= 1
+        if not self.children[parent] and parent >= self.first_free:
+            self.leaves[parent] = None
 
 class LZWCoder(TextCoder):
-    """LZW (Dictionary-based) coding implementation"""
+    """
+    LZW (Dictionary-based) coding implementation.
+
+    By default the encoded output is a list of integer codes. With packed=True
+    it is bytes: codes are written MSB-first with a width that starts at 9 bits
+    and grows by one whenever the largest code the encoder could emit no longer
+    fits, so the decoder can track the width from its own dictionary size.
+
+    max_dict_size bounds the dictionary; once it is full the policy decides
+    what happens: 'freeze' stops adding entries, 'reset' emits CLEAR_CODE and
+    starts over with a fresh dictionary, and 'lru' replaces the least recently
+    used leaf entry.
+
+    The dictionary is built over byte values. bytes-like input is coded as is
+    and decodes to bytes; str input is coded as Latin-1 when every character
+    fits and as UTF-8 otherwise (recorded as text_encoding in the metadata).
+    """
+    
+    def __init__(self, packed: bool = False, max_dict_size: Optional[int] = None, policy: str = 'freeze'):
+        super().__init__()
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown LZW dictionary policy: {policy}")
+        if max_dict_size is not None and max_dict_size <= self._first_free(policy) + 1:
+            raise ValueError(f"max_dict_size must exceed {self._first_free(policy) + 1}")
+        self.packed = packed
+        self.max_dict_size = max_dict_size
+        self.policy = policy
+        self.logger.info(f"Initialized LZW Coder with packed={packed}, max_dict_size={max_dict_size}, policy={policy}")
     
     @property
     def algorithm_name(self) -> str:
         return "LZW (Dictionary-based)"
     
-    def encode(self, data: str) -> Tuple[List[int], Dict]:
+    @staticmethod
+    def _first_free(policy: str) -> int:
+        """First code available for multi-character entries"""
+        return CLEAR_CODE + 1 if policy == 'reset' else 256
+    
+    def encode(self, data: Union[str, BytesLike]) -> Tuple[Union[List[int], bytes], Dict]:
         super().encode(data)
-        dictionary = {chr(i): i for i in range(256)}
-        current_string = ""
+        data = as_text_input(data)
+        if isinstance(data, bytes):
+            text_encoding = None
+            symbol_data = data
+        else:
+            text_encoding = 'latin-1' if not data or max(data) <= '\xff' else 'utf-8'
+            symbol_data = data.encode(text_encoding, 'surrogatepass')
+        policy = self.policy
+        max_size = self.max_dict_size if self.max_dict_size is not None else float('inf')
+        first_free = self._first_free(policy)
+        packed = self.packed
         encoded_output = []
+        append = encoded_output.append
+        writer = BitWriter()
+        write = writer.write
+        width = MIN_CODE_WIDTH
         
-        for char in data:
-            combined_string = current_string + char
-            if combined_string in dictionary:
-                current_string = combined_string
+        # Multi-symbol entries are keyed on (prefix code, next symbol) packed into
+        # one integer, so extending the current match never builds a string
+        dictionary: Dict[int, int] = {}
+        lookup = dictionary.get
+        keys: Dict[int, int] = {}
+        next_code = first_free
+        lru = LeafLRU(first_free)
+        use_lru = policy == 'lru'
+        resets = 0
+        symbols = iter(symbol_data)
+        current = next(symbols, -1)
+        
+        for symbol in symbols:
+            key = (current << SYMBOL_BITS) | symbol
+            code = lookup(key)
+            if code is not None:
+                current = code
+                continue
+            
+            if packed:
+                write(current, width)
             else:
-                self.logger.debug(f"Adding '{combined_string}' to dictionary at index {len(dictionary)}")
-                encoded_output.append(dictionary[current_string])
-                dictionary[combined_string] = len(dictionary)
-                current_string = char
+                append(current)
+            if use_lru:
+                lru.touch(current)
+            if next_code < max_size:
+                slot = next_code
+                next_code += 1
+                if next_code - 1 >= 1 << width:
+                    width += 1
+            elif use_lru:
+                slot = lru.victim(exclude=current)
+                if slot is not None:
+                    lru.remove(slot)
+                    del dictionary[keys[slot]]
+            elif policy == 'reset':
+                if packed:
+                    write(CLEAR_CODE, width)
+                else:
+                    append(CLEAR_CODE)
+                dictionary, next_code, width = {}, first_free, MIN_CODE_WIDTH
+                lookup = dictionary.get
+                resets += 1
+                slot = None
+            else:
+                slot = None
+            
+            if slot is not None:
+                dictionary[key] = slot
+                if use_lru:
+                    keys[slot] = key
+                    lru.add(slot, current)
+            current = symbol
         
-        if current_string:
-            encoded_output.append(dictionary[current_string])
+        if current >= 0:
+            if packed:
+                write(current, width)
+            else:
+                append(current)
         
-        self.logger.debug(f"Final dictionary size: {len(dictionary)}")
+        self.logger.debug(f"Final dictionary size: {256 + len(dictionary)}")
+        
+        if packed:
+            encoded_output = writer.getvalue()
         
         metadata = {
             'original_length': len(data),
             'encoded_length': len(encoded_output),
-            'dictionary_size': len(dictionary)
+            'dictionary_size': 256 + len(dictionary),
+            'max_dict_size': self.max_dict_size,
+            'policy': policy,
+            'resets': resets,
+            'packed': self.packed,
+            'input_type': 'str' if text_encoding else 'bytes'
         }
+        if text_encoding:
+            metadata['text_encoding'] = text_encoding
         
-        self.logger.info(f"Encoded {metadata['original_length']} chars to {metadata['encoded_length']} codes.")
+        self.logger.info(f"Encoded {metadata['original_length']} chars to {metadata['encoded_length']} "
+                         f"{'bytes' if self.packed else 'codes'}.")
         return encoded_output, metadata
     
-    def decode(self, encoded_data: List[int], metadata: Dict) -> str:
+    def _iter_packed_codes(self, encoded_data: BytesLike, max_size: float, policy: str) -> Iterator[int]:
+        """Read variable-width codes, mirroring the encoder's dictionary growth"""
+        reader = BitReader(encoded_data)
+        first_free = self._first_free(policy)
+        # Size of the encoder's dictionary when it emitted the next code
+        dictionary_size = first_free
+        while True:
+            width = max(MIN_CODE_WIDTH, (dictionary_size - 1).bit_length())
+            if reader.bits_remaining < width:
+                return
+            code = reader.read(width)
+            yield code
+            if policy == 'reset' and code == CLEAR_CODE:
+                dictionary_size = first_free
+            elif dictionary_size < max_size:
+                dictionary_size += 1
+    
+    def decode(self, encoded_data: Union[List[int], BytesLike], metadata: Dict) -> Union[str, bytes]:
         super().decode(encoded_data, metadata)
+        binary = metadata.get('input_type') == 'bytes'
         if not encoded_data:
-            return ""
+            return b"" if binary else ""
         
-        dictionary = {i: chr(i) for i in range(256)}
-        current_code = encoded_data[0]
-        current_string = dictionary[current_code]
-        decoded_output = [current_string]
+        policy = metadata.get('policy', 'freeze')
+        max_size = metadata.get('max_dict_size') or float('inf')
+        first_free = self._first_free(policy)
+        if isinstance(encoded_data, (bytes, bytearray, memoryview)):
+            codes = self._iter_packed_codes(encoded_data, max_size, policy)
+        else:
+            codes = iter(encoded_data)
         
-        for code in encoded_data[1:]:
-            if code in dictionary:
-                entry = dictionary[code]
-            else:
-                entry = current_string + current_string[0]
+        # Every entry's string has already been written to the output (it is the
+        # previous code's string plus one symbol), so an entry is just the offset
+        # and length of that earlier occurrence and decoding a code is a slice copy
+        offset = [0] * first_free
+        length = [1] * first_free
+        output = bytearray(metadata.get('original_length', 0))
+        position = 0
+        previous_position = 0
+        next_code = first_free
+        lru = LeafLRU(first_free)
+        use_lru = policy == 'lru'
+        previous = -1
+        code_count = 0
+        
+        for code in codes:
+            code_count += 1
+            if policy == 'reset' and code == CLEAR_CODE:
+                next_code, previous = first_free, -1
+                continue
+            
+            slot = None
+            if previous >= 0:
+                # Slot the encoder filled after emitting the previous code
+                if next_code < max_size:
+                    slot = next_code
+                    next_code += 1
+                    if slot == len(offset):
+                        offset.append(0)
+                        length.append(0)
+                elif use_lru:
+                    slot = lru.victim(exclude=previous)
+                    if slot is not None:
+                        lru.remove(slot)
+                if slot is not None:
+                    offset[slot] = previous_position
+                    length[slot] = length[previous] + 1
+                    if use_lru:
+                        lru.add(slot, previous)
+                if use_lru:
+                    lru.touch(code)
             
-            decoded_output.append(entry)
-            self.logger.debug(f"Adding '{current_string + entry[0]}' to dictionary at index {len(dictionary)}")
-            dictionary[len(dictionary)] = current_string + entry[0]
-            current_string = entry
+            if code < 256:
+                end = position + 1
+                if end > len(output):
+                    output.append(code)
+                else:
+                    output[position] = code
+            elif code < next_code:
+                start = offset[code]
+                end = position + length[code]
+                if code == slot:
+                    # KwKwK: the entry ends with its own first symbol, which is
+                    # the byte about to be written at position
+                    output[position:end - 1] = output[start:position]
+                    output[end - 1:end] = output[start:start + 1]
+                else:
+                    output[position:end] = output[start:start + length[code]]
+            else:
+                raise ValueError(f"Invalid LZW code {code}")
+            previous_position = position
+            position = end
+            previous = code
         
-        decoded_string = ''.join(decoded_output)
-        self.logger.info(f"Decoded {len(encoded_data)} codes to {len(decoded_string)} chars.")
+        del output[position:]
+        if binary:
+            self.logger.info(f"Decoded {code_count} codes to {position} bytes.")
+            return bytes(output)
+        decoded_string = output.decode(metadata.get('text_encoding', 'latin-1'), 'surrogatepass')
+        self.logger.info(f"Decoded {code_count} codes to {len(decoded_string)} chars.")
         return decoded_string
@@ -0,0 +1,81 @@
+# algorithms/text/pipeline.py
+from typing import Any, Dict, Sequence, Tuple, Type, Union
+from algorithms.text.run_length import RunLengthCoder
+from algorithms.text.transforms import Transform, create_transform
+from core.base_coder import TextCoder
+from core.bitstream import BytesLike
+from core.factory import coder_factory
+from core.utils import as_text_input
+
+class TransformPipelineCoder(TextCoder):
+    """
+    Pre-transform stages chained in front of a text coder.
+
+    The input runs through each transform in order (by default the
+    bzip2-style Burrows-Wheeler + move-to-front pair) and the result is coded
+    by the inner coder, a coder_factory text coder name (e.g. "Huffman") or
+    class; extra keyword arguments are passed to its constructor. Every
+    stage's parameters are kept in the metadata, so decoding needs no
+    configuration beyond the inner coder.
+
+    BWT + MTF turns repeated phrases into long runs of small values, which
+    suits RunLengthCoder, HuffmanCoder and ArithmeticCoder. Transformed data
+    can contain digits, which the run-length string format cannot separate
+    from run counts, so a RunLengthCoder inner coder always uses binary=True.
+    """
+
+    def __init__(self, coder: Union[str, Type[TextCoder]] = "Huffman",
+                 transforms: Sequence[Union[str, Transform]] = ('bwt', 'mtf'), **coder_options):
+        super().__init__()
+        self.coder = coder
+        # Resolved up front so an unknown coder name fails here, not mid-encode
+        self.coder_class = coder_factory.get_text_coder_class(coder) if isinstance(coder, str) else coder
+        self.transforms = [create_transform(t) if isinstance(t, str) else t for t in transforms]
+        if issubclass(self.coder_class, RunLengthCoder):
+            if coder_options.get('binary') is False:
+                raise ValueError("RunLengthCoder's string format is ambiguous for transformed data, "
+                                 "which can contain digits; use binary=True")
+            coder_options = {**coder_options, 'binary': True}
+        self.coder_options = coder_options
+        self.logger.info(f"Initialized Transform Pipeline Coder with transforms="
+                         f"{[t.name for t in self.transforms]}, coder={coder}, options={coder_options}")
+
+    @property
+    def algorithm_name(self) -> str:
+        return "Transform Pipeline"
+
+    def _inner_coder(self) -> TextCoder:
+        return self.coder_class(**self.coder_options)
+
+    def encode(self, data: Union[str, BytesLike]) -> Tuple[Any, Dict]:
+        super().encode(data)
+        data = as_text_input(data)
+        transformed = data
+        stages = []
+        for transform in self.transforms:
+            transformed, params = transform.forward(transformed)
+            stages.append([transform.name, params])
+            self.logger.debug(f"Applied {transform.name} transform")
+
+        inner = self._inner_coder()
+        encoded, inner_metadata = inner.encode(transformed)
+        metadata = {
+            'coder': inner.algorithm_name,
+            'transforms': stages,
+            'coder_metadata': inner_metadata,
+            'original_length': len(data),
+            'input_type': 'bytes' if isinstance(data, bytes) else 'str'
+        }
+        self.logger.info(f"Encoded {len(data)} symbols through {[name for name, _ in stages]} "
+                         f"and {inner.algorithm_name}.")
+        return encoded, metadata
+
+    def decode(self, encoded_data: Any, metadata: Dict) -> Union[str, bytes]:
+        super().decode(encoded_data, metadata)
+        decoded = as_text_input(self._inner_coder().decode(encoded_data, metadata['coder_metadata']))
+        for name, params in reversed(metadata['transforms']):
+            decoded = create_transform(name).inverse(decoded, params)
+            self.logger.debug(f"Inverted {name} transform")
+
+        self.logger.info(f"Decoded {len(decoded)} symbols.")
+        return decoded
@@ -0,0 +1,195 @@
+# algorithms/text/prefix_codes.py
+from typing import Any, Dict, List, Tuple
+from core.bitstream import BytesLike, encode_varint, decode_varint
+
+def canonical_codes(lengths: Dict[Any, int]) -> Dict[Any, Tuple[int, int]]:
+    """
+    Assign canonical prefix codes from code lengths.
+    Symbols are ordered by (length, symbol) and receive consecutive code values,
+    so encoder and decoder only need to agree on the lengths.
+    Returns a mapping of symbol -> (code value, code length).
+    """
+    codes = {}
+    code = 0
+    previous_length = 0
+    for symbol, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+        code <<= length - previous_length
+        codes[symbol] = (code, length)
+        code += 1
+        previous_length = length
+    return codes
+
+def length_limited_code_lengths(frequencies: Dict[Any, int], max_length: int) -> Dict[Any, int]:
+    """
+    Optimal code lengths no longer than max_length, via package-merge.
+
+    Level lists are built bottom-up by merging the sorted leaves with pairs
+    ("packages") from the level below. The first 2n-2 items of the top list are
+    selected; at every level the selection is a prefix of that level's list, so
+    each symbol's length is the number of levels whose selected prefix holds it.
+    """
+    symbols = sorted(frequencies, key=lambda symbol: (frequencies[symbol], symbol))
+    n = len(symbols)
+    if n <= 1:
+        return {symbol: 1 for symbol in symbols}
+    if (1 << max_length) < n:
+        raise ValueError(f"Cannot code {n} symbols with codes of at most {max_length} bits")
+
+    leaves = [(frequencies[symbol], True) for symbol in symbols]
+    # Each level stores (weight, is_leaf) items in merge order
+    levels = [leaves]
+    for _ in range(max_length - 1):
+        below = levels[-1]
+        packages = [(below[i][0] + below[i + 1][0], False) for i in range(0, len(below) - 1, 2)]
+        merged = []
+        i = j = 0
+        while i < n or j < len(packages):
+            if j == len(packages) or (i < n and leaves[i][0] <= packages[j][0]):
+                merged.append(leaves[i])
+                i += 1
+            else:
+                merged.append(packages[j])
+                j += 1
+        levels.append(merged)
+
+    counts = [0] * n
+    selected = 2 * n - 2
+    for level in reversed(levels):
+        leaf_index = 0
+        packages = 0
+        for _, is_leaf in level[:selected]:
+            if is_leaf:
+                counts[leaf_index] += 1
+                leaf_index += 1
+            else:
+                packages += 1
+        selected = 2 * packages
+    return {symbol: counts[i] for i, symbol in enumerate(symbols)}
+
+def to_code_points(mapping: Dict[Any, int]) -> Dict[int, int]:
+    """Re-key a per-symbol mapping by integer symbol (the code point for characters)"""
+    return {(symbol if isinstance(symbol, int) else ord(symbol)): value for symbol, value in mapping.items()}
+
+def from_code_points(mapping: Dict[int, int], as_str: bool = True) -> Dict[Any, int]:
+    """Inverse of to_code_points: key by character when as_str, else keep byte values"""
+    if as_str:
+        return {chr(symbol): value for symbol, value in mapping.items()}
+    return dict(mapping)
+
+def code_lengths_to_bytes(lengths: Dict[int, int]) -> bytes:
+    """
+    Serialize integer-keyed code lengths in a DHT-like layout:
+    varint max_length, one varint symbol count per length, then the
+    symbols (varints) in canonical order.
+    """
+    max_length = max(lengths.values(), default=0)
+    by_length: List[List[int]] = [[] for _ in range(max_length + 1)]
+    for symbol, length in lengths.items():
+        by_length[length].append(symbol)
+
+    out = bytearray(encode_varint(max_length))
+    for length in range(1, max_length + 1):
+        out += encode_varint(len(by_length[length]))
+    for length in range(1, max_length + 1):
+        for symbol in sorted(by_length[length]):
+            out += encode_varint(symbol)
+    return bytes(out)
+
+def code_lengths_from_bytes(buffer: BytesLike, offset: int = 0) -> Tuple[Dict[int, int], int]:
+    """Inverse of code_lengths_to_bytes, returning (lengths, new_offset)"""
+    max_length, offset = decode_varint(buffer, offset)
+    counts = []
+    for _ in range(max_length):
+        count, offset = decode_varint(buffer, offset)
+        counts.append(count)
+
+    lengths = {}
+    for length, count in enumerate(counts, start=1):
+        for _ in range(count):
+            symbol, offset = decode_varint(buffer, offset)
+            lengths[symbol] = length
+    return lengths, offset
+
+# Bits resolved per lookup by the table decoder; codes longer than this
+# fall back to a per-length dictionary search
+DEFAULT_LOOKUP_BITS = 10
+
+class PrefixDecodeTable:
+    """
+    Lookup table for decoding any prefix code several bits at a time.
+    Every lookup_bits-wide window maps to the (symbol, length) of the code it
+    starts with; windows that begin a longer code map to length 0 and are
+    resolved through the long_codes dictionary.
+    """
+
+    def __init__(self, codes: Dict[Any, Tuple[int, int]], lookup_bits: int = DEFAULT_LOOKUP_BITS):
+        self.max_length = max((length for _, length in codes.values()), default=0)
+        self.lookup_bits = max(1, min(lookup_bits, self.max_length))
+        self.table: List[Tuple[Any, int]] = [(None, 0)] * (1 << self.lookup_bits)
+        self.long_codes: Dict[Tuple[int, int], Any] = {}
+
+        for symbol, (value, length) in codes.items():
+            if length <= self.lookup_bits:
+                span = 1 << (self.lookup_bits - length)
+                start = value << (self.lookup_bits - length)
+                self.table[start:start + span] = [(symbol, length)] * span
+            else:
+                self.long_codes[(length, value)] = symbol
+
+    def decode(self, buffer: BytesLike, count: int = None, bit_length: int = None) -> List[Any]:
+        """
+        Decode symbols from buffer until count symbols have been produced or
+        bit_length bits consumed (whichever is given; count wins if both are).
+        """
+        if count is None and bit_length is None:
+            raise ValueError("Either count or bit_length is required")
+        data = bytes(buffer)
+        table = self.table
+        lookup_bits = self.lookup_bits
+        lookup_mask = (1 << lookup_bits) - 1
+        max_length = self.max_length
+        if bit_length is None:
+            bit_length = len(data) * 8
+        limit = count if count is not None else bit_length  # every code is at least one bit long
+
+        decoded = []
+        append = decoded.append
+        acc = 0
+        nbits = 0
+        pos = 0
+        consumed = 0
+        while len(decoded) < limit and consumed < bit_length:
+            if nbits < max_length:
+                # Refill eight bytes at a time; reading past the end yields zero bits
+                acc = ((acc & ((1 << nbits) - 1)) << 64) | int.from_bytes(data[pos:pos + 8].ljust(8, b'\0'), 'big')
+                nbits += 64
+                pos += 8
+            symbol, length = table[(acc >> (nbits - lookup_bits)) & lookup_mask]
+            if not length:
+                symbol, length = self._decode_long(acc, nbits)
+            append(symbol)
+            nbits -= length
+            consumed += length
+
+        if consumed > bit_length or (count is not None and len(decoded) < count):
+            raise ValueError("Prefix-coded payload ended before the full message was decoded")
+        return decoded
+
+    def _decode_long(self, acc: int, nbits: int) -> Tuple[Any, int]:
+        window = (acc >> (nbits - self.max_length)) & ((1 << self.max_length) - 1)
+        for length in range(self.lookup_bits + 1, self.max_length + 1):
+            symbol = self.long_codes.get((length, window >> (self.max_length - length)))
+            if symbol is not None:
+                return symbol, length
+        raise ValueError("Invalid prefix code in payload")
+
+def codes_from_bit_strings(codes: Dict[Any, str]) -> Dict[Any, Tuple[int, int]]:
+    """Convert a symbol -> '0'/'1' string mapping into symbol -> (value, length)"""
+    return {symbol: (int(bits, 2), len(bits)) for symbol, bits in codes.items()}
+
+def bit_string_to_bytes(bits: str) -> bytes:
+    """Pack a '0'/'1' string MSB-first into bytes, zero-padding the last byte"""
+    if not bits:
+        return b''
+    padding = -len(bits) % 8
+    return (int(bits, 2) << padding).to_bytes((len(bits) + padding) // 8, 'big')
@@ -0,0 +1,196 @@
+# algorithms/text/range_coder.py
+from bisect import bisect_right
+from typing import Any, Dict, List, Tuple
+from core.bitstream import BytesLike, decode_varint, encode_varint
+
+# Renormalize whenever the range drops below 2^24, keeping at least 24 bits
+# of precision; totals are therefore limited to 2^16 so range // total >= 2^8
+TOP = 1 << 24
+MAX_TOTAL_BITS = 16
+MAX_TOTAL = 1 << MAX_TOTAL_BITS
+
+class RangeEncoder:
+    """
+    32-bit integer range encoder with carry propagation (as in LZMA).
+    Bytes are emitted as soon as they can no longer change, so memory use
+    is bounded by the output and the cost per symbol is constant.
+    """
+
+    def __init__(self):
+        self.low = 0
+        self.range = 0xFFFFFFFF
+        self._cache = 0
+        self._cache_size = 1
+        self._output = bytearray()
+
+    def encode(self, start: int, size: int, total: int) -> None:
+        """Narrow the interval to [start, start + size) out of total"""
+        r = self.range // total
+        self.low += r * start
+        self.range = r * size
+        while self.range < TOP:
+            self.range <<= 8
+            self._shift_low()
+
+    def _shift_low(self) -> None:
+        if self.low < 0xFF000000 or self.low >= 1 << 32:
+            carry = self.low >> 32
+            byte = self._cache
+            while True:
+                self._output.append((byte + carry) & 0xFF)
+                byte = 0xFF
+                self._cache_size -= 1
+                if not self._cache_size:
+                    break
+            self._cache = (self.low >> 24) & 0xFF
+        self._cache_size += 1
+        self.low = (self.low & 0x00FFFFFF) << 8
+
+    def finish(self) -> bytes:
+        """Flush the remaining state and return all encoded bytes"""
+        for _ in range(5):
+            self._shift_low()
+        # The first byte is always zero (the interval never leaves [0, 2^32)), so drop it
+        return bytes(self._output[1:])
+
+class RangeDecoder:
+    """Decoder matching RangeEncoder; call get_freq then decode for every symbol"""
+
+    def __init__(self, data: BytesLike, offset: int = 0):
+        self._data = bytes(data)
+        self._pos = offset
+        self.range = 0xFFFFFFFF
+        self.code = 0
+        self._step = 1
+        for _ in range(4):
+            self.code = (self.code << 8) | self._next_byte()
+
+    def _next_byte(self) -> int:
+        pos = self._pos
+        self._pos += 1
+        return self._data[pos] if pos < len(self._data) else 0
+
+    def get_freq(self, total: int) -> int:
+        """Return the cumulative frequency the next symbol's interval contains"""
+        self._step = self.range // total
+        return min(self.code // self._step, total - 1)
+
+    def decode(self, start: int, size: int) -> None:
+        """Consume the symbol whose interval is [start, start + size)"""
+        self.code -= start * self._step
+        self.range = self._step * size
+        while self.range < TOP:
+            self.code = ((self.code << 8) | self._next_byte()) & 0xFFFFFFFF
+            self.range <<= 8
+
+def quantize_frequencies(frequencies: Dict[Any, int], max_total: int = MAX_TOTAL) -> Dict[Any, int]:
+    """Scale frequencies so they sum to at most max_total, keeping every count >= 1"""
+    total = sum(frequencies.values())
+    if total <= max_total:
+        return dict(frequencies)
+    if len(frequencies) > max_total // 2:
+        raise ValueError(f"Too many distinct symbols ({len(frequencies)}) for a total of {max_total}")
+    budget = max_total - len(frequencies)
+    return {symbol: max(1, freq * budget // total) for symbol, freq in frequencies.items()}
+
+def frequencies_to_bytes(frequencies: Dict[int, int]) -> bytes:
+    """
+    Serialize integer-keyed frequencies compactly: varint symbol count, then
+    per symbol in ascending order the varint gap from the previous symbol and
+    the varint frequency.
+    """
+    out = bytearray(encode_varint(len(frequencies)))
+    previous = -1
+    for symbol in sorted(frequencies):
+        out += encode_varint(symbol - previous - 1)
+        out += encode_varint(frequencies[symbol])
+        previous = symbol
+    return bytes(out)
+
+def frequencies_from_bytes(buffer: BytesLike, offset: int = 0) -> Tuple[Dict[int, int], int]:
+    """Inverse of frequencies_to_bytes, returning (frequencies, new_offset)"""
+    count, offset = decode_varint(buffer, offset)
+    frequencies = {}
+    symbol = -1
+    for _ in range(count):
+        gap, offset = decode_varint(buffer, offset)
+        symbol += gap + 1
+        frequencies[symbol], offset = decode_varint(buffer, offset)
+    return frequencies, offset
+
+class CumulativeFrequencyTable:
+    """
+    Precomputed cumulative frequencies for a static model.
+    Symbols are kept in sorted order; encoding looks up a symbol's interval in
+    a dict and decoding finds the interval containing a target by binary search.
+    """
+
+    def __init__(self, frequencies: Dict[Any, int]):
+        self.symbols: List[Any] = sorted(frequencies)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.starts: List[int] = []
+        self.sizes: List[int] = []
+        self.total = 0
+        for symbol in self.symbols:
+            self.starts.append(self.total)
+            self.sizes.append(frequencies[symbol])
+            self.total += frequencies[symbol]
+        self.intervals: Dict[Any, Tuple[int, int]] = {
+            symbol: (self.starts[i], self.sizes[i]) for i, symbol in enumerate(self.symbols)
+        }
+
+    def find(self, target: int) -> Tuple[Any, int, int]:
+        """Return (symbol, start, size) of the interval containing target"""
+        i = bisect_right(self.starts, target) - 1
+        return self.symbols[i], self.starts[i], self.sizes[i]
+
+class FenwickTree:
+    """
+    Binary indexed tree over symbol counts for adaptive models: updating a
+    count, querying a cumulative frequency and locating the symbol for a
+    cumulative target are all O(log n).
+    """
+
+    def __init__(self, size: int, initial: int = 0):
+        self.size = size
+        self._tree = [0] * (size + 1)
+        self.total = 0
+        if initial:
+            for i in range(size):
+                self.add(i, initial)
+
+    def add(self, index: int, delta: int) -> None:
+        """Add delta to the count of symbol index"""
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, index: int) -> int:
+        """Sum of the counts of symbols [0, index)"""
+        result = 0
+        i = index
+        while i > 0:
+            result += self._tree[i]
+            i -= i & -i
+        return result
+
+    def count(self, index: int) -> int:
+        return self.prefix_sum(index + 1) - self.prefix_sum(index)
+
+    def find(self, target: int) -> Tuple[int, int]:
+        """
+        Return (index, start) of the symbol whose cumulative interval
+        [start, start + count) contains target, with 0 <= target < total.
+        """
+        position = 0
+        start = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            candidate = position + step
+            if candidate <= self.size and start + self._tree[candidate] <= target:
+                position = candidate
+                start += self._tree[candidate]
+            step >>= 1
+        return position, start
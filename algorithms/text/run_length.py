@@ -1,68 +1,110 @@
 # algorithms/text/run_length.py
-from typing import Dict, Tuple, Any
+import re
+import numpy as np
+from typing import Dict, Tuple, Any, Union
 from core.base_coder import TextCoder
+from core.bitstream import BytesLike, decode_varint_array, encode_varint_array
+from core.utils import as_text_input
+
+RUN_PATTERN = re.compile(r'(\d+)(.)', re.DOTALL)
+
+# Binary format flag: the symbols are byte values and decode to bytes
+FLAG_BYTES = 0x01
 
 class RunLengthCoder(TextCoder):
-    """Run Length Encoding implementation"""
+    """
+    Run Length Encoding implementation.
+
+    Runs are located with NumPy over a uint32 code-point view of the text. By
+    default the output is the classic "<count><char>" string, which cannot
+    represent input containing digits unambiguously. With binary=True the
+    output is bytes: a flags byte followed by interleaved varint
+    (count, code point) pairs, which round-trips any input.
+
+    bytes-like input is run-length coded over byte values and decodes to
+    bytes; in the string format each byte is written as the Latin-1 character
+    with the same value.
+    """
+    
+    def __init__(self, binary: bool = False):
+        super().__init__()
+        self.binary = binary
+        self.logger.info(f"Initialized Run Length Coder with binary={binary}")
     
     @property
     def algorithm_name(self) -> str:
         return "Run Length Encoding"
     
-    def encode(self, data: str) -> Tuple[str, Dict]:
+    def _find_runs(self, symbols: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (start index, length) of every run of equal symbols"""
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(symbols)) + 1))
+        counts = np.diff(np.append(starts, symbols.size))
+        return starts, counts
+    
+    def encode(self, data: Union[str, BytesLike]) -> Tuple[Union[str, bytes], Dict]:
         super().encode(data)
+        data = as_text_input(data)
+        binary_input = isinstance(data, bytes)
+        flags = FLAG_BYTES if binary_input else 0
+        input_type = 'bytes' if binary_input else 'str'
         if not data:
-            return "", {"original_length": 0}
+            return (bytes([flags]) if self.binary else ""), {"original_length": 0, "input_type": input_type}
         
-        encoded = []
-        current_char = data[0]
-        count = 1
+        if binary_input:
+            symbols = np.frombuffer(data, dtype=np.uint8)
+        else:
+            symbols = np.frombuffer(data.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        starts, counts = self._find_runs(symbols)
+        self.logger.debug(f"Found {len(starts)} runs")
         
-        for char in data[1:]:
-            if char == current_char:
-                count += 1
-            else:
-                encoded.append(f"{count}{current_char}")
-                current_char = char
-                count = 1
-        
-        encoded.append(f"{count}{current_char}")
-        encoded_string = ''.join(encoded)
-        
-        self.logger.debug(f"Encoded string: {encoded_string}")
+        if self.binary:
+            pairs = np.empty(2 * len(starts), dtype=np.uint64)
+            pairs[0::2] = counts
+            pairs[1::2] = symbols[starts]
+            encoded = bytes([flags]) + encode_varint_array(pairs)
+        else:
+            text = data.decode('latin-1') if binary_input else data
+            encoded = ''.join([f"{count}{text[start]}" for start, count in zip(starts.tolist(), counts.tolist())])
+            self.logger.debug(f"Encoded string: {encoded}")
         
         metadata = {
             'original_length': len(data),
-            'encoded_length': len(encoded_string),
-            'compression_ratio': len(data) / len(encoded_string) if encoded_string else 1
+            'encoded_length': len(encoded),
+            'runs': len(starts),
+            'binary': self.binary,
+            'input_type': input_type,
+            'compression_ratio': len(data) / len(encoded) if encoded else 1
         }
         
-        self.logger.info(f"Encoded {metadata['original_length']} chars to {metadata['encoded_length']} chars.")
-        return encoded_string, metadata
+        self.logger.info(f"Encoded {metadata['original_length']} chars to {metadata['encoded_length']} "
+                         f"{'bytes' if self.binary else 'chars'}.")
+        return encoded, metadata
+    
+    def _decode_binary(self, encoded_data: BytesLike) -> Union[str, bytes]:
+        buffer = memoryview(encoded_data).cast('B')
+        pairs = decode_varint_array(buffer[1:])
+        if pairs.size % 2:
+            raise ValueError("Run length payload has an unpaired count")
+        counts = pairs[0::2].astype(np.int64)
+        if buffer[0] & FLAG_BYTES:
+            return np.repeat(pairs[1::2].astype(np.uint8), counts).tobytes()
+        symbols = pairs[1::2].astype('<u4')
+        return np.repeat(symbols, counts).tobytes().decode('utf-32-le', 'surrogatepass')
     
-    def decode(self, encoded_data: str, metadata: Dict) -> str:
+    def decode(self, encoded_data: Union[str, BytesLike], metadata: Dict) -> Union[str, bytes]:
         super().decode(encoded_data, metadata)
-        if not encoded_data:
-            return ""
+        if isinstance(encoded_data, (bytes, bytearray, memoryview)):
+            decoded_string = self._decode_binary(encoded_data)
+            self.logger.info(f"Decoded {len(encoded_data)} bytes to {len(decoded_string)} chars.")
+            return decoded_string
         
-        decoded = []
-        i = 0
+        binary_input = metadata.get('input_type') == 'bytes'
+        if not encoded_data:
+            return b"" if binary_input else ""
         
-        while i < len(encoded_data):
-            count_str = ""
-            
-            # Extract count
-            while i < len(encoded_data) and encoded_data[i].isdigit():
-                count_str += encoded_data[i]
-                i += 1
-            
-            if i < len(encoded_data) and count_str:
-                count = int(count_str)
-                char = encoded_data[i]
-                decoded.append(char * count)
-                self.logger.debug(f"Decoded run: count={count}, char='{char}'")
-                i += 1
+        # Each run is a greedy digit count followed by exactly one character
+        decoded = [char * int(count) for count, char in RUN_PATTERN.findall(encoded_data)]
         
         decoded_string = ''.join(decoded)
         self.logger.info(f"Decoded {len(encoded_data)} chars to {len(decoded_string)} chars.")
-        return decoded_string
+        return decoded_string.encode('latin-1') if binary_input else decoded_string
@@ -1,10 +1,37 @@
 # algorithms/text/shannon_fano.py
-from collections import defaultdict
-from typing import Dict, Tuple, Any
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, Tuple, Any, Optional, Union
 from core.base_coder import TextCoder
+from core.bitstream import BytesLike
+from core.statistics import SymbolStatistics, symbol_statistics
+from core.utils import as_text_input
+from algorithms.text.prefix_codes import (PrefixDecodeTable, bit_string_to_bytes, canonical_codes,
+                                          code_lengths_from_bytes, code_lengths_to_bytes, codes_from_bit_strings,
+                                          from_code_points, to_code_points)
 
 class ShannonFanoCoder(TextCoder):
-    """Shannon-Fano coding implementation"""
+    """
+    Shannon-Fano coding implementation.
+
+    Symbols sorted by decreasing frequency are split recursively into two
+    groups of as nearly equal total frequency as possible. Group totals come
+    from one prefix-sum array and each split point is found by binary search,
+    so building the code costs O(n log n) in the alphabet size. Decoding uses
+    a multi-bit lookup table.
+
+    bytes-like input is coded over the 256 byte values and decodes to bytes.
+
+    With compact_metadata=True only the Shannon-Fano code lengths are kept:
+    symbols get canonical codes of those lengths (same compression, different
+    bit patterns) and the metadata carries a small 'code_table' bytes header
+    instead of the 'code_dict' dict.
+    """
+    
+    def __init__(self, compact_metadata: bool = False):
+        super().__init__()
+        self.compact_metadata = compact_metadata
+        self.logger.info(f"Initialized Shannon-Fano Coder with compact_metadata={compact_metadata}")
     
     @property
     def algorithm_name(self) -> str:
@@ -13,61 +40,86 @@ class ShannonFanoCoder(TextCoder):
     def _sort_by_frequency(self, frequencies):
         return sorted(frequencies.items(), key=lambda item: item[1], reverse=True)
     
-    def _shannon_fano_code(self, symbols, code_dict, prefix=""):
+    def _shannon_fano_code(self, symbols: List[Tuple[Any, int]], code_dict: Dict[Any, str]) -> None:
         if len(symbols) == 1:
-            symbol, _ = symbols[0]
-            code_dict[symbol] = prefix if prefix else "0"
+            code_dict[symbols[0][0]] = "0"
             return
         
-        total = sum(freq for _, freq in symbols)
-        cumulative = 0
-        split_index = 0
-        
-        for i, (_, freq) in enumerate(symbols):
-            cumulative += freq
-            if cumulative >= total / 2:
-                split_index = i + 1
-                break
-        
-        self.logger.debug(f"Splitting at index {split_index} with prefix '{prefix}'")
-        self._shannon_fano_code(symbols[:split_index], code_dict, prefix + "0")
-        self._shannon_fano_code(symbols[split_index:], code_dict, prefix + "1")
+        # cumulative[i] is the total frequency of symbols[:i]
+        cumulative = [0] + list(accumulate(freq for _, freq in symbols))
+        # Explicit stack of (start, end, prefix) groups, so deep splits of
+        # skewed alphabets cannot hit the recursion limit
+        stack = [(0, len(symbols), "")]
+        while stack:
+            start, end, prefix = stack.pop()
+            if end - start == 1:
+                code_dict[symbols[start][0]] = prefix
+                continue
+            
+            # First split whose left group holds at least half the total; the one
+            # before it may be more balanced, so keep whichever is closer to half
+            total = cumulative[end] - cumulative[start]
+            half = cumulative[start] + total / 2
+            split_index = bisect_left(cumulative, half, start + 1, end - 1)
+            if split_index > start + 1 and half - cumulative[split_index - 1] < cumulative[split_index] - half:
+                split_index -= 1
+            
+            self.logger.debug(f"Splitting at index {split_index} with prefix '{prefix}'")
+            stack.append((split_index, end, prefix + "1"))
+            stack.append((start, split_index, prefix + "0"))
     
-    def encode(self, data: str) -> Tuple[str, Dict]:
+    def encode(self, data: Union[str, BytesLike], stats: Optional[SymbolStatistics] = None) -> Tuple[str, Dict]:
         super().encode(data)
-        frequencies = defaultdict(int)
-        for char in data:
-            frequencies[char] += 1
+        data = as_text_input(data)
+        input_type = 'bytes' if isinstance(data, bytes) else 'str'
+        if not data:
+            return "", {'code_dict': {}, 'original_length': 0, 'encoded_length': 0, 'input_type': input_type}
         
+        frequencies = symbol_statistics(data, stats).frequencies
         self.logger.debug(f"Calculated frequencies: {dict(frequencies)}")
         
         sorted_symbols = self._sort_by_frequency(frequencies)
         code_dict = {}
         self._shannon_fano_code(sorted_symbols, code_dict)
+        if self.compact_metadata:
+            lengths = {char: len(code) for char, code in code_dict.items()}
+            code_dict = {char: format(value, f'0{length}b')
+                         for char, (value, length) in canonical_codes(lengths).items()}
         self.logger.debug(f"Generated Shannon-Fano code dict: {code_dict}")
         
-        encoded_message = ''.join(code_dict.get(char, '') for char in data)
+        encoded_message = ''.join([code_dict[char] for char in data])
         
         metadata = {
-            'code_dict': code_dict,
             'original_length': len(data),
-            'encoded_length': len(encoded_message)
+            'encoded_length': len(encoded_message),
+            'input_type': input_type
         }
+        if self.compact_metadata:
+            metadata['code_table'] = code_lengths_to_bytes(to_code_points(lengths))
+        else:
+            metadata['code_dict'] = code_dict
         
         self.logger.info(f"Encoded {metadata['original_length']} chars to {metadata['encoded_length']} bits.")
         return encoded_message, metadata
     
-    def decode(self, encoded_data: str, metadata: Dict) -> str:
+    def decode(self, encoded_data: str, metadata: Dict) -> Union[str, bytes]:
         super().decode(encoded_data, metadata)
-        reverse_code_dict = {v: k for k, v in metadata['code_dict'].items()}
-        decoded_message = ''
-        current_code = ''
+        if 'code_table' in metadata:
+            lengths, _ = code_lengths_from_bytes(metadata['code_table'])
+            codes = canonical_codes(from_code_points(lengths, as_str=metadata.get('input_type') != 'bytes'))
+        else:
+            codes = codes_from_bit_strings(metadata.get('code_dict') or {})
         
-        for bit in encoded_data:
-            current_code += bit
-            if current_code in reverse_code_dict:
-                decoded_message += reverse_code_dict[current_code]
-                current_code = ''
+        if encoded_data and codes:
+            table = PrefixDecodeTable(codes)
+            decoded_symbols = table.decode(bit_string_to_bytes(encoded_data), count=metadata.get('original_length'),
+                                           bit_length=len(encoded_data))
+        else:
+            decoded_symbols = []
         
+        if metadata.get('input_type') == 'bytes':
+            decoded_message = bytes(decoded_symbols)
+        else:
+            decoded_message = ''.join(decoded_symbols)
         self.logger.info(f"Decoded {len(encoded_data)} bits to {len(decoded_message)} chars.")
         return decoded_message
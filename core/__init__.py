@@ -24,12 +24,14 @@ def _register_algorithms():
         from algorithms.text.arithmetic import ArithmeticCoder
         from algorithms.text.run_length import RunLengthCoder
         from algorithms.text.lzw import LZWCoder
+        from algorithms.text.adaptive_huffman import AdaptiveHuffmanCoder
         
         coder_factory.register_text_coder("Shannon-Fano", ShannonFanoCoder)
         coder_factory.register_text_coder("Huffman", HuffmanCoder)
         coder_factory.register_text_coder("Arithmetic", ArithmeticCoder)
         coder_factory.register_text_coder("Run Length", RunLengthCoder)
         coder_factory.register_text_coder("LZW", LZWCoder)
+        coder_factory.register_text_coder("Adaptive Huffman", AdaptiveHuffmanCoder)
         
         # Image algorithms
         from algorithms.image.jpeg import JPEGCoder
@@ -46,8 +48,10 @@ def _register_algorithms():
     except ImportError as e:
         print(f"Warning: Could not register some algorithms: {e}")
 
-# Auto-register algorithms
-_register_algorithms()
+# Register algorithms on the first factory lookup: importing them here would
+# close an import cycle (algorithm -> core.base_coder -> core -> algorithm)
+# whenever an algorithm module is imported before core
+coder_factory.register_loader(_register_algorithms)
 
 __all__ = [
     'coder_factory',
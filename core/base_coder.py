@@ -1,6 +1,7 @@
 # core/base_coder.py
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Tuple
+from typing import IO, Any, Dict, Tuple, Union
+from core.container import DEFAULT_CHUNK_SIZE, ContainerError, read_container, write_container
 from core.logger import get_logger
 
 class BaseCoder(ABC):
@@ -25,6 +26,24 @@ class BaseCoder(ABC):
         """Return the name of the algorithm"""
         pass
 
+    def save(self, target: Union[str, IO], encoded_data: Any, metadata: Dict,
+             chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Save encoded output and metadata in the container format, returning the bytes written"""
+        written = write_container(target, self.algorithm_name, encoded_data, metadata, chunk_size)
+        self.logger.info(f"Saved {self.algorithm_name} output to a {written}-byte container")
+        return written
+
+    def load(self, source: Union[str, IO]) -> Tuple[Any, Dict]:
+        """
+        Load (encoded_data, metadata) saved by save() from a path or binary
+        file object; the container must hold this algorithm's output
+        """
+        algorithm, encoded_data, metadata = read_container(source)
+        if algorithm != self.algorithm_name:
+            raise ContainerError(f"Container holds {algorithm} output, not {self.algorithm_name}")
+        self.logger.info(f"Loaded {self.algorithm_name} output from {getattr(source, 'name', source)}")
+        return encoded_data, metadata
+
 class TextCoder(BaseCoder):
     """Base class for text coding algorithms"""
     pass
@@ -0,0 +1,166 @@
+# core/bitstream.py
+import numpy as np
+from typing import BinaryIO, Optional, Tuple, Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+def encode_varint(value: int) -> bytes:
+    """Encode a non-negative integer as an unsigned LEB128 varint"""
+    if value < 0:
+        raise ValueError(f"Varints must be non-negative, got {value}")
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def decode_varint(buffer: BytesLike, offset: int = 0) -> Tuple[int, int]:
+    """Decode a varint at offset, returning (value, new_offset)"""
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(buffer):
+            raise ValueError("Truncated varint")
+        byte = buffer[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def encode_varint_array(values: np.ndarray) -> bytes:
+    """Vectorized encode_varint over an array of non-negative integers, concatenated"""
+    values = np.asarray(values, dtype=np.uint64)
+    if values.size == 0:
+        return b''
+    nbytes = np.ones(values.shape, dtype=np.int64)
+    for k in range(1, 10):
+        nbytes += values >= np.uint64(1 << (7 * k))
+    offsets = np.cumsum(nbytes) - nbytes
+    out = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    for k in range(int(nbytes.max())):
+        mask = nbytes > k
+        byte = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        byte |= (nbytes[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[offsets[mask] + k] = byte
+    return out.tobytes()
+
+def decode_varint_array(buffer: BytesLike) -> np.ndarray:
+    """Vectorized inverse of encode_varint_array, returning a uint64 array"""
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if data.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+    if data[-1] >= 0x80:
+        raise ValueError("Truncated varint")
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    position = np.arange(data.size) - np.repeat(starts, ends - starts + 1)
+    if position.max() >= 10:
+        raise ValueError("Varint too long")
+    shifted = (data & 0x7F).astype(np.uint64) << (7 * position).astype(np.uint64)
+    return np.add.reduceat(shifted, starts)
+
+def pack_bits(values: np.ndarray, lengths: np.ndarray, pad_bit: int = 0, chunk_size: int = 1 << 18) -> bytes:
+    """
+    Vectorized BitWriter: concatenate the low lengths[i] bits of values[i]
+    (lengths of at most 32), MSB first, padding the last byte with pad_bit.
+    Codes are expanded to bit arrays a chunk at a time to bound memory.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.asarray(lengths, dtype=np.uint64)
+    columns = np.arange(32, dtype=np.uint64)
+    chunks = []
+    for start in range(0, values.size, chunk_size):
+        length = lengths[start:start + chunk_size]
+        aligned = (values[start:start + chunk_size] << (np.uint64(32) - length)).astype('>u4')
+        bits = np.unpackbits(aligned.view(np.uint8).reshape(-1, 4), axis=1)
+        chunks.append(bits[columns < length[:, None]])
+    bits = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.uint8)
+    padding = -bits.size % 8
+    if padding:
+        bits = np.concatenate((bits, np.full(padding, pad_bit, dtype=np.uint8)))
+    return np.packbits(bits).tobytes()
+
+def read_varint(stream: BinaryIO) -> Optional[int]:
+    """Read a varint from a binary file-like object; None at a clean end of stream"""
+    value = 0
+    shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            if shift:
+                raise ValueError("Truncated varint")
+            return None
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+class BitWriter:
+    """MSB-first bit writer that accumulates whole bytes into a bytearray"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._acc = 0
+        self._nbits = 0
+        self._popped = 0
+
+    def write(self, value: int, nbits: int) -> None:
+        """Append the low nbits of value; nbits may be arbitrarily large"""
+        self._acc = (self._acc << nbits) | value
+        self._nbits += nbits
+        if self._nbits >= 8:
+            whole_bytes, self._nbits = divmod(self._nbits, 8)
+            self._buffer += (self._acc >> self._nbits).to_bytes(whole_bytes, 'big')
+            self._acc &= (1 << self._nbits) - 1
+
+    @property
+    def bit_length(self) -> int:
+        return (self._popped + len(self._buffer)) * 8 + self._nbits
+
+    def pop_bytes(self) -> bytes:
+        """Remove and return the whole bytes written so far, keeping any partial byte"""
+        completed = bytes(self._buffer)
+        self._popped += len(completed)
+        self._buffer.clear()
+        return completed
+
+    def getvalue(self) -> bytes:
+        """Return the written (not yet popped) bits, zero-padded to a whole number of bytes"""
+        if self._nbits:
+            return bytes(self._buffer) + bytes([(self._acc << (8 - self._nbits)) & 0xFF])
+        return bytes(self._buffer)
+
+class BitReader:
+    """MSB-first bit reader over a bytes-like object"""
+
+    def __init__(self, data: BytesLike, offset: int = 0, bit_length: int = None):
+        self._data = memoryview(data).cast('B') if not isinstance(data, bytes) else data
+        self._pos = offset * 8
+        self._end = bit_length + offset * 8 if bit_length is not None else len(data) * 8
+
+    @property
+    def bits_remaining(self) -> int:
+        return self._end - self._pos
+
+    def read(self, nbits: int) -> int:
+        """Read nbits as an unsigned integer"""
+        if nbits > self.bits_remaining:
+            raise ValueError("Attempted to read past the end of the bitstream")
+        value = self.peek(nbits)
+        self._pos += nbits
+        return value
+
+    def peek(self, nbits: int) -> int:
+        """Return the next nbits without consuming them, zero-padded past the end"""
+        start_byte = self._pos >> 3
+        end_byte = (self._pos + nbits + 7) >> 3
+        chunk = int.from_bytes(self._data[start_byte:end_byte], 'big')
+        available = (min(end_byte, len(self._data)) - start_byte) * 8
+        chunk <<= (end_byte - start_byte) * 8 - available
+        shift = (end_byte - start_byte) * 8 - (self._pos & 7) - nbits
+        return (chunk >> shift) & ((1 << nbits) - 1)
+
+    def skip(self, nbits: int) -> None:
+        self._pos += nbits
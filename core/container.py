@@ -0,0 +1,343 @@
+# core/container.py
+import io
+import mmap
+import os
+import struct
+import zlib
+import numpy as np
+from decimal import Decimal
+from typing import IO, Any, Dict, List, Tuple, Union
+from core.bitstream import BytesLike, decode_varint, encode_varint
+
+# Container layout (all fixed-width fields little-endian):
+#
+#   header   magic b'ICTC' | u16 version | u16 flags | u8 payload kind | u8 reserved
+#            | u32 chunk size | u16 algorithm id length | algorithm id (UTF-8)
+#   metadata u64 length | u32 CRC-32 | serialized metadata value
+#   payload  chunks of at most chunk size bytes, back to back
+#   index    u32 chunk count | per chunk: u64 offset | u32 length | u32 CRC-32
+#   trailer  u64 index offset | b'ICTE'
+#
+# Raw payloads (bytes) are stored as is so they can be sliced straight out of
+# a memory map; any other encoded output is stored as a serialized value.
+
+MAGIC = b'ICTC'
+END_MAGIC = b'ICTE'
+FORMAT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+PAYLOAD_RAW = 0
+PAYLOAD_VALUE = 1
+
+_HEADER = struct.Struct('<4sHHBBIH')
+_METADATA_HEADER = struct.Struct('<QI')
+_INDEX_ENTRY = struct.Struct('<QII')
+_TRAILER = struct.Struct('<Q4s')
+
+# Value tags of the self-describing serialization used for metadata and
+# non-bytes payloads
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STR = 5
+TAG_BYTES = 6
+TAG_LIST = 7
+TAG_TUPLE = 8
+TAG_DICT = 9
+TAG_DECIMAL = 10
+TAG_NDARRAY = 11
+TAG_BITS = 12
+
+class ContainerError(ValueError):
+    """Raised for malformed or corrupted container files"""
+    pass
+
+def _encode_bytes(data: BytesLike) -> bytes:
+    return encode_varint(len(data)) + bytes(data)
+
+def _decode_bytes(buffer: BytesLike, offset: int) -> Tuple[bytes, int]:
+    length, offset = decode_varint(buffer, offset)
+    if offset + length > len(buffer):
+        raise ContainerError("Truncated value")
+    return bytes(buffer[offset:offset + length]), offset + length
+
+def serialize_value(value: Any) -> bytes:
+    """
+    Serialize metadata-like values: None, bool, int, float, str, bytes, Decimal,
+    list, tuple, dict (any serializable keys), NumPy arrays and NumPy scalars.
+    '0'/'1' strings are stored bit-packed.
+    """
+    out = bytearray()
+    _serialize_into(out, value)
+    return bytes(out)
+
+def _serialize_into(out: bytearray, value: Any) -> None:
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None:
+        out.append(TAG_NONE)
+    elif value is False or value is True:
+        out.append(TAG_TRUE if value else TAG_FALSE)
+    elif isinstance(value, int):
+        out.append(TAG_INT)
+        out += encode_varint(value * 2 if value >= 0 else -value * 2 - 1)  # zigzag
+    elif isinstance(value, float):
+        out.append(TAG_FLOAT)
+        out += struct.pack('<d', value)
+    elif isinstance(value, str):
+        if value and not value.strip('01'):
+            padding = -len(value) % 8
+            out.append(TAG_BITS)
+            out += encode_varint(len(value))
+            out += (int(value, 2) << padding).to_bytes((len(value) + padding) // 8, 'big')
+        else:
+            out.append(TAG_STR)
+            out += _encode_bytes(value.encode('utf-8', 'surrogatepass'))
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        out.append(TAG_BYTES)
+        out += _encode_bytes(memoryview(value).cast('B'))
+    elif isinstance(value, Decimal):
+        out.append(TAG_DECIMAL)
+        out += _encode_bytes(str(value).encode('ascii'))
+    elif isinstance(value, (list, tuple)):
+        out.append(TAG_LIST if isinstance(value, list) else TAG_TUPLE)
+        out += encode_varint(len(value))
+        for item in value:
+            _serialize_into(out, item)
+    elif isinstance(value, dict):
+        out.append(TAG_DICT)
+        out += encode_varint(len(value))
+        for key, item in value.items():
+            _serialize_into(out, key)
+            _serialize_into(out, item)
+    elif isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise ContainerError("Object arrays cannot be serialized")
+        array = np.ascontiguousarray(value)
+        out.append(TAG_NDARRAY)
+        out += _encode_bytes(array.dtype.str.encode('ascii'))
+        out += encode_varint(array.ndim)
+        for dim in array.shape:
+            out += encode_varint(dim)
+        out += _encode_bytes(memoryview(array).cast('B'))
+    else:
+        raise ContainerError(f"Cannot serialize value of type {type(value).__name__}")
+
+def deserialize_value(buffer: BytesLike, offset: int = 0) -> Tuple[Any, int]:
+    """Inverse of serialize_value, returning (value, new_offset)"""
+    if offset >= len(buffer):
+        raise ContainerError("Truncated value")
+    tag = buffer[offset]
+    offset += 1
+    if tag == TAG_NONE:
+        return None, offset
+    if tag in (TAG_FALSE, TAG_TRUE):
+        return tag == TAG_TRUE, offset
+    if tag == TAG_INT:
+        zigzag, offset = decode_varint(buffer, offset)
+        return (zigzag >> 1) ^ -(zigzag & 1), offset
+    if tag == TAG_FLOAT:
+        return struct.unpack_from('<d', buffer, offset)[0], offset + 8
+    if tag == TAG_STR:
+        raw, offset = _decode_bytes(buffer, offset)
+        return raw.decode('utf-8', 'surrogatepass'), offset
+    if tag == TAG_BITS:
+        nbits, offset = decode_varint(buffer, offset)
+        nbytes = (nbits + 7) // 8
+        value = int.from_bytes(buffer[offset:offset + nbytes], 'big') >> (nbytes * 8 - nbits)
+        return format(value, f'0{nbits}b'), offset + nbytes
+    if tag == TAG_BYTES:
+        return _decode_bytes(buffer, offset)
+    if tag == TAG_DECIMAL:
+        raw, offset = _decode_bytes(buffer, offset)
+        return Decimal(raw.decode('ascii')), offset
+    if tag in (TAG_LIST, TAG_TUPLE):
+        count, offset = decode_varint(buffer, offset)
+        items = []
+        for _ in range(count):
+            item, offset = deserialize_value(buffer, offset)
+            items.append(item)
+        return (items if tag == TAG_LIST else tuple(items)), offset
+    if tag == TAG_DICT:
+        count, offset = decode_varint(buffer, offset)
+        result = {}
+        for _ in range(count):
+            key, offset = deserialize_value(buffer, offset)
+            result[key], offset = deserialize_value(buffer, offset)
+        return result, offset
+    if tag == TAG_NDARRAY:
+        dtype, offset = _decode_bytes(buffer, offset)
+        ndim, offset = decode_varint(buffer, offset)
+        shape = []
+        for _ in range(ndim):
+            dim, offset = decode_varint(buffer, offset)
+            shape.append(dim)
+        raw, offset = _decode_bytes(buffer, offset)
+        return np.frombuffer(raw, dtype=np.dtype(dtype.decode('ascii'))).reshape(shape).copy(), offset
+    raise ContainerError(f"Unknown value tag {tag}")
+
+def write_container(target: Union[str, IO], algorithm: str, encoded_data: Any, metadata: Dict,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Write encoded output and its metadata to a path or binary file object, returning the bytes written"""
+    if isinstance(encoded_data, (bytes, bytearray, memoryview)):
+        kind = PAYLOAD_RAW
+        payload = memoryview(encoded_data).cast('B')
+    else:
+        kind = PAYLOAD_VALUE
+        payload = memoryview(serialize_value(encoded_data))
+
+    algorithm_id = algorithm.encode('utf-8')
+    metadata_bytes = serialize_value(metadata)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, kind, 0, chunk_size, len(algorithm_id)) + algorithm_id
+    header += _METADATA_HEADER.pack(len(metadata_bytes), zlib.crc32(metadata_bytes)) + metadata_bytes
+
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, 'wb') as f:
+            return _write_sections(f, header, payload, chunk_size)
+    return _write_sections(target, header, payload, chunk_size)
+
+def _write_sections(f: IO, header: bytes, payload: memoryview, chunk_size: int) -> int:
+    f.write(header)
+    position = len(header)
+    index = []
+    for start in range(0, len(payload), chunk_size):
+        chunk = payload[start:start + chunk_size]
+        f.write(chunk)
+        index.append(_INDEX_ENTRY.pack(position, len(chunk), zlib.crc32(chunk)))
+        position += len(chunk)
+
+    index_bytes = struct.pack('<I', len(index)) + b''.join(index)
+    f.write(index_bytes)
+    f.write(_TRAILER.pack(position, END_MAGIC))
+    return position + len(index_bytes) + _TRAILER.size
+
+class ContainerReader:
+    """
+    Memory-mapped reader for container files.
+    The header, metadata and index are parsed on open; payload chunks are
+    checked against their CRC and copied out only when requested, so a single
+    chunk can be read without touching the rest of the file.
+
+    source is a path or a binary file object. A file object backed by a real
+    file and positioned at its start is memory-mapped; any other (BytesIO,
+    sockets, a container after other data) is read from its current position.
+    File objects are left open for the caller.
+    """
+
+    def __init__(self, source: Union[str, os.PathLike, IO]):
+        owned = isinstance(source, (str, os.PathLike))
+        self._file = open(source, 'rb') if owned else None
+        self._map = None
+        try:
+            self._map = self._open_map(self._file if owned else source)
+            if self._map is None:
+                self._data = source.read()
+            else:
+                self._data = self._map
+            if not self._data:
+                raise ContainerError("Not a container file: file is empty")
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def _open_map(f: IO):
+        """Memory-map f when it is a real file read from its start, else return None"""
+        try:
+            if f.tell() != 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, io.UnsupportedOperation, OSError, ValueError):  # empty files cannot be mapped
+            return None
+
+    def _parse(self) -> None:
+        data = self._data
+        if len(data) < _HEADER.size + _METADATA_HEADER.size + 4 + _TRAILER.size:
+            raise ContainerError("Not a container file: too short")
+        magic, self.version, self.flags, self.payload_kind, _, self.chunk_size, id_length = \
+            _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ContainerError("Not a container file: bad magic number")
+        if self.version > FORMAT_VERSION:
+            raise ContainerError(f"Unsupported container version {self.version}")
+        index_offset, end_magic = _TRAILER.unpack_from(data, len(data) - _TRAILER.size)
+        if end_magic != END_MAGIC:
+            raise ContainerError("Container trailer is missing or corrupted")
+        index_end = len(data) - _TRAILER.size
+
+        offset = _HEADER.size
+        if offset + id_length + _METADATA_HEADER.size > index_end:
+            raise ContainerError("Container algorithm id is corrupted")
+        try:
+            self.algorithm = bytes(data[offset:offset + id_length]).decode('utf-8')
+        except UnicodeDecodeError as error:
+            raise ContainerError("Container algorithm id is corrupted") from error
+        offset += id_length
+
+        metadata_length, metadata_crc = _METADATA_HEADER.unpack_from(data, offset)
+        offset += _METADATA_HEADER.size
+        if offset + metadata_length > index_end:
+            raise ContainerError("Container metadata is corrupted")
+        metadata_bytes = data[offset:offset + metadata_length]
+        if zlib.crc32(metadata_bytes) != metadata_crc:
+            raise ContainerError("Container metadata is corrupted")
+        self.metadata = _deserialize_checked(metadata_bytes, "metadata")
+
+        if not offset + metadata_length <= index_offset <= index_end - 4:
+            raise ContainerError("Container index offset is corrupted")
+        (count,) = struct.unpack_from('<I', data, index_offset)
+        if index_offset + 4 + count * _INDEX_ENTRY.size != index_end:
+            raise ContainerError("Container index is corrupted")
+        self.index: List[Tuple[int, int, int]] = [
+            _INDEX_ENTRY.unpack_from(data, index_offset + 4 + i * _INDEX_ENTRY.size) for i in range(count)]
+        if any(chunk_offset + length > index_offset for chunk_offset, length, _ in self.index):
+            raise ContainerError("Container index points past the payload")
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self.index)
+
+    def read_chunk(self, i: int) -> bytes:
+        """Read payload chunk i, verifying its CRC"""
+        offset, length, crc = self.index[i]
+        chunk = self._data[offset:offset + length]
+        if zlib.crc32(chunk) != crc:
+            raise ContainerError(f"Container chunk {i} is corrupted")
+        return chunk
+
+    def read_payload(self) -> Any:
+        """Reassemble the encoded output as it was passed to write_container"""
+        payload = b''.join(self.read_chunk(i) for i in range(self.chunk_count))
+        if self.payload_kind == PAYLOAD_RAW:
+            return payload
+        return _deserialize_checked(payload, "payload")
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> 'ContainerReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def _deserialize_checked(buffer: BytesLike, section: str) -> Any:
+    """deserialize_value for a whole container section, reporting any failure as ContainerError"""
+    try:
+        value, _ = deserialize_value(buffer)
+    except ContainerError:
+        raise
+    except (ValueError, TypeError, OverflowError, struct.error) as error:
+        raise ContainerError(f"Container {section} is corrupted: {error}") from error
+    return value
+
+def read_container(source: Union[str, IO]) -> Tuple[str, Any, Dict]:
+    """Read a container from a path or binary file object, returning (algorithm, encoded_data, metadata)"""
+    with ContainerReader(source) as reader:
+        return reader.algorithm, reader.read_payload(), reader.metadata
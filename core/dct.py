@@ -0,0 +1,81 @@
+# core/dct.py
+import numpy as np
+from functools import lru_cache
+from typing import Tuple
+
+BLOCK_SIZE = 8
+
+# Natural (row-major) index of each coefficient in zigzag order, as used by
+# JPEG and H.261 to put low frequencies first
+ZIGZAG = np.array([
+     0,  1,  8, 16,  9,  2,  3, 10,
+    17, 24, 32, 25, 18, 11,  4,  5,
+    12, 19, 26, 33, 40, 48, 41, 34,
+    27, 20, 13,  6,  7, 14, 21, 28,
+    35, 42, 49, 56, 57, 50, 43, 36,
+    29, 22, 15, 23, 30, 37, 44, 51,
+    58, 59, 52, 45, 38, 31, 39, 46,
+    53, 60, 61, 54, 47, 55, 62, 63
+])
+
+# Zigzag position of each natural index
+UNZIGZAG = np.argsort(ZIGZAG)
+
+@lru_cache(maxsize=8)
+def dct_matrix(n: int = BLOCK_SIZE) -> np.ndarray:
+    """Orthonormal DCT-II matrix: row k is the k-th cosine basis vector"""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.sqrt(2.0 / n) * np.cos((2 * x + 1) * k * np.pi / (2 * n))
+    matrix[0] /= np.sqrt(2.0)
+    matrix.setflags(write=False)
+    return matrix
+
+def to_blocks(plane: np.ndarray, block_size: int = BLOCK_SIZE) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Split a 2-D plane into an (N, block_size, block_size) array in raster order.
+    Edges are padded by repeating the last row/column, as JPEG encoders do.
+    Returns the blocks and the (rows, columns) block grid shape.
+    """
+    height, width = plane.shape
+    pad_y = -height % block_size
+    pad_x = -width % block_size
+    if pad_y or pad_x:
+        plane = np.pad(plane, ((0, pad_y), (0, pad_x)), mode='edge')
+    rows = plane.shape[0] // block_size
+    columns = plane.shape[1] // block_size
+    blocks = plane.reshape(rows, block_size, columns, block_size).swapaxes(1, 2)
+    return blocks.reshape(-1, block_size, block_size), (rows, columns)
+
+def from_blocks(blocks: np.ndarray, grid: Tuple[int, int], shape: Tuple[int, int] = None) -> np.ndarray:
+    """Inverse of to_blocks, cropping to shape when given"""
+    rows, columns = grid
+    block_size = blocks.shape[-1]
+    plane = blocks.reshape(rows, columns, block_size, block_size).swapaxes(1, 2)
+    plane = plane.reshape(rows * block_size, columns * block_size)
+    if shape is not None:
+        plane = plane[:shape[0], :shape[1]]
+    return plane
+
+def forward_dct(blocks: np.ndarray) -> np.ndarray:
+    """
+    2-D DCT of every block in an (N, n, n) array as two batched matrix multiplies.
+    float32 input stays float32; anything else is computed in float64.
+    """
+    matrix = dct_matrix(blocks.shape[-1]).astype(np.result_type(blocks, np.float32), copy=False)
+    return matrix @ blocks @ matrix.T
+
+def inverse_dct(coefficients: np.ndarray, size: int = None) -> np.ndarray:
+    """
+    2-D inverse DCT of every block in an (N, n, n) array, in float32 for float32 input.
+    With size < n only the top-left size x size coefficients are used with a
+    size-point transform, which downscales each block by n / size directly
+    in the DCT domain (the technique libjpeg uses for scaled decoding).
+    """
+    n = coefficients.shape[-1]
+    dtype = np.result_type(coefficients, np.float32)
+    if size is None or size == n:
+        matrix = dct_matrix(n).astype(dtype, copy=False)
+        return matrix.T @ coefficients @ matrix
+    matrix = dct_matrix(size).astype(dtype, copy=False)
+    return matrix.T @ (coefficients[:, :size, :size] * dtype.type(size / n)) @ matrix
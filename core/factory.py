@@ -1,5 +1,5 @@
 # core/factory.py
-from typing import Dict, Type
+from typing import Callable, Dict, List, Type
 from core.base_coder import BaseCoder, TextCoder, ImageCoder, AudioCoder, VideoCoder
 from core.logger import get_logger
 
@@ -13,6 +13,15 @@ class CoderFactory:
         self._image_coders: Dict[str, Type[ImageCoder]] = {}
         self._audio_coders: Dict[str, Type[AudioCoder]] = {}
         self._video_coders: Dict[str, Type[VideoCoder]] = {}
+        self._loaders: List[Callable[[], None]] = []
+    
+    def register_loader(self, loader: Callable[[], None]):
+        """Defer registrations to loader, run once before the first lookup"""
+        self._loaders.append(loader)
+    
+    def _run_loaders(self):
+        while self._loaders:
+            self._loaders.pop(0)()
     
     def register_text_coder(self, name: str, coder_class: Type[TextCoder]):
         logger.debug(f"Registering text coder: {name}")
@@ -32,13 +41,31 @@ class CoderFactory:
     
     def create_text_coder(self, name: str) -> TextCoder:
         logger.info(f"Creating text coder: {name}")
+        self._run_loaders()
         if name not in self._text_coders:
             logger.error(f"Unknown text coder: {name}")
             raise ValueError(f"Unknown text coder: {name}")
         return self._text_coders[name]()
     
+    def get_text_coder_class(self, name: str) -> Type[TextCoder]:
+        """Return the registered class, e.g. to construct coders in worker processes"""
+        self._run_loaders()
+        if name not in self._text_coders:
+            logger.error(f"Unknown text coder: {name}")
+            raise ValueError(f"Unknown text coder: {name}")
+        return self._text_coders[name]
+    
+    def get_text_coder_name(self, coder_class: Type[TextCoder]) -> str:
+        """Return the name coder_class is registered under"""
+        self._run_loaders()
+        for name, registered in self._text_coders.items():
+            if registered is coder_class:
+                return name
+        raise ValueError(f"Text coder {coder_class.__name__} is not registered")
+    
     def create_image_coder(self, name: str) -> ImageCoder:
         logger.info(f"Creating image coder: {name}")
+        self._run_loaders()
         if name not in self._image_coders:
             logger.error(f"Unknown image coder: {name}")
             raise ValueError(f"Unknown image coder: {name}")
@@ -46,6 +73,7 @@ class CoderFactory:
     
     def create_audio_coder(self, name: str) -> AudioCoder:
         logger.info(f"Creating audio coder: {name}")
+        self._run_loaders()
         if name not in self._audio_coders:
             logger.error(f"Unknown audio coder: {name}")
             raise ValueError(f"Unknown audio coder: {name}")
@@ -53,12 +81,14 @@ class CoderFactory:
     
     def create_video_coder(self, name: str) -> VideoCoder:
         logger.info(f"Creating video coder: {name}")
+        self._run_loaders()
         if name not in self._video_coders:
             logger.error(f"Unknown video coder: {name}")
             raise ValueError(f"Unknown video coder: {name}")
         return self._video_coders[name]()
     
     def get_available_coders(self):
+        self._run_loaders()
         return {
             'text': list(self._text_coders.keys()),
             'image': list(self._image_coders.keys()),
@@ -0,0 +1,55 @@
+# core/parallel.py
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+def default_max_in_flight() -> int:
+    """Default number of queued tasks: two per CPU keeps every worker busy"""
+    return 2 * (os.cpu_count() or 1)
+
+def bounded_map(fn: Callable[[Any], Any], iterable: Iterable[Any], executor: Optional[Executor] = None,
+                max_in_flight: Optional[int] = None) -> Iterator[Any]:
+    """
+    Ordered map over an executor that submits lazily.
+    Unlike Executor.map, which consumes the whole input up front, at most
+    max_in_flight tasks are pending at any time, so memory stays bounded when
+    the input is a long stream. Without an executor this is a plain map.
+    """
+    if executor is None:
+        yield from map(fn, iterable)
+        return
+    if max_in_flight is None:
+        max_in_flight = default_max_in_flight()
+
+    pending = deque()
+    for item in iterable:
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+def bounded_as_completed(fn: Callable[[Any], Any], iterable: Iterable[Any], executor: Optional[Executor] = None,
+                         max_in_flight: Optional[int] = None) -> Iterator[Tuple[int, Any]]:
+    """
+    Like bounded_map, but yields (input index, result) pairs as soon as each
+    task finishes, so one slow item does not hold back the rest.
+    """
+    if executor is None:
+        yield from enumerate(map(fn, iterable))
+        return
+    if max_in_flight is None:
+        max_in_flight = default_max_in_flight()
+
+    pending = {}
+    for index, item in enumerate(iterable):
+        if len(pending) >= max_in_flight:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+        pending[executor.submit(fn, item)] = index
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future.result()
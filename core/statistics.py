@@ -0,0 +1,70 @@
+# core/statistics.py
+import numpy as np
+from typing import Any, Dict, Union
+from core.bitstream import BytesLike
+
+# Code points below this are counted with np.bincount; sparser text with
+# larger code points falls back to np.unique to bound the count array
+BINCOUNT_LIMIT = 1 << 16
+
+class SymbolStatistics:
+    """
+    Order-0 symbol statistics of one input, computed in a single vectorized pass.
+
+    str input is viewed as a uint32 array of code points and bytes-like input
+    as a uint8 array, then counted with np.bincount. The result can be passed
+    to several coders (encode(data, stats=...)) and to entropy calculations,
+    so comparing algorithms on the same input scans it only once.
+    """
+
+    def __init__(self, data: Union[str, BytesLike]):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            self.input_type = 'bytes'
+            values = np.frombuffer(data, dtype=np.uint8)
+        else:
+            self.input_type = 'str'
+            values = np.frombuffer(data.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        self.length = int(values.size)
+
+        if values.size and (self.input_type == 'bytes' or int(values.max()) < BINCOUNT_LIMIT):
+            counts = np.bincount(values)
+            self.symbols = np.flatnonzero(counts)
+            self.counts = counts[self.symbols]
+        else:
+            self.symbols, self.counts = np.unique(values, return_counts=True)
+        self._frequencies = None
+
+    @property
+    def frequencies(self) -> Dict[Any, int]:
+        """Symbol -> count, keyed by character for str input and by byte value for bytes"""
+        if self._frequencies is None:
+            symbols = self.symbols.tolist()
+            if self.input_type == 'str':
+                symbols = [chr(symbol) for symbol in symbols]
+            self._frequencies = dict(zip(symbols, self.counts.tolist()))
+        return self._frequencies
+
+    @property
+    def alphabet_size(self) -> int:
+        return int(self.symbols.size)
+
+    def entropy(self) -> float:
+        """Shannon entropy in bits per symbol"""
+        if not self.length:
+            return 0.0
+        probabilities = self.counts / self.length
+        return float(-(probabilities * np.log2(probabilities)).sum())
+
+    def matches(self, data: Union[str, BytesLike]) -> bool:
+        """Cheap check that these statistics were computed for data"""
+        is_bytes = isinstance(data, (bytes, bytearray, memoryview))
+        length = memoryview(data).nbytes if is_bytes else len(data)
+        return (self.input_type == 'bytes') == is_bytes and self.length == length
+
+def symbol_statistics(data: Union[str, BytesLike], stats: SymbolStatistics = None) -> SymbolStatistics:
+    """Return stats when it was computed for data, otherwise compute it now"""
+    if stats is None:
+        return SymbolStatistics(data)
+    if not stats.matches(data):
+        raise ValueError("Symbol statistics were computed for a different input")
+    return stats
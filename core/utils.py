@@ -1,8 +1,10 @@
 # core/utils.py
 import os
 import numpy as np
-from typing import List, Dict, Any, Union
+from typing import IO, Iterable, Iterator, List, Dict, Any, Union
 import json
+from core.bitstream import BytesLike
+from core.statistics import SymbolStatistics
 from core.logger import get_logger
 
 logger = get_logger()
@@ -29,6 +31,34 @@ def load_text_file(filepath: str, encoding: str = 'utf-8') -> str:
         logger.error(f"Error loading text file {filepath}: {e}", exc_info=True)
         raise
 
+def iter_chunks(source: Union[IO, Iterable], chunk_size: int = 1 << 20) -> Iterator[Union[str, bytes]]:
+    """Yield chunks from a file-like object (via read) or pass through an iterable of chunks"""
+    if hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        for chunk in source:
+            if chunk:
+                yield chunk
+
+def iter_text_file(filepath: str, chunk_size: int = 1 << 20, encoding: str = 'utf-8') -> Iterator[str]:
+    """Stream text content from file in chunks of at most chunk_size characters"""
+    logger.debug(f"Streaming text file: {filepath} with encoding {encoding}")
+    with open(filepath, 'r', encoding=encoding) as f:
+        yield from iter_chunks(f, chunk_size)
+
+def as_text_input(data: Union[str, BytesLike]) -> Union[str, bytes]:
+    """
+    Normalize text coder input: str is returned unchanged, and bytes, bytearray
+    or memoryview input becomes bytes, a sequence of symbols from 0 to 255
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data)
+    return data
+
 def save_text_file(filepath: str, content: str, encoding: str = 'utf-8') -> None:
     """Save text content to file"""
     logger.debug(f"Saving text file: {filepath}")
@@ -116,26 +146,13 @@ def import_results_from_json(filepath: str) -> Dict[str, Any]:
         logger.error(f"Error importing results from JSON {filepath}: {e}", exc_info=True)
         raise
 
-def calculate_entropy(data: str) -> float:
-    """Calculate Shannon entropy of text data"""
-    if not data:
-        return 0.0
-    
-    # Count character frequencies
-    char_counts = {}
-    for char in data:
-        char_counts[char] = char_counts.get(char, 0) + 1
-    
-    # Calculate entropy
-    entropy = 0.0
-    data_length = len(data)
-    
-    for count in char_counts.values():
-        probability = count / data_length
-        if probability > 0:
-            entropy -= probability * np.log2(probability)
+def calculate_entropy(data: Union[str, BytesLike], stats: SymbolStatistics = None) -> float:
+    """Calculate Shannon entropy of text (or binary) data, reusing precomputed statistics if given"""
+    if stats is None:
+        stats = SymbolStatistics(data)
+    entropy = stats.entropy()
     
-    logger.debug(f"Calculated entropy for data of length {len(data)}: {entropy}")
+    logger.debug(f"Calculated entropy for data of length {stats.length}: {entropy}")
     return entropy
 
 def pad_to_multiple(data: Union[str, List], multiple: int, pad_char: str = '0') -> Union[str, List]:
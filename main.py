@@ -19,12 +19,14 @@ def register_algorithms():
     from algorithms.text.arithmetic import ArithmeticCoder
     from algorithms.text.run_length import RunLengthCoder
     from algorithms.text.lzw import LZWCoder
+    from algorithms.text.adaptive_huffman import AdaptiveHuffmanCoder
     
     coder_factory.register_text_coder("Shannon-Fano", ShannonFanoCoder)
     coder_factory.register_text_coder("Huffman", HuffmanCoder)
     coder_factory.register_text_coder("Arithmetic", ArithmeticCoder)
     coder_factory.register_text_coder("Run Length", RunLengthCoder)
     coder_factory.register_text_coder("LZW", LZWCoder)
+    coder_factory.register_text_coder("Adaptive Huffman", AdaptiveHuffmanCoder)
     
     # Image algorithms
     from algorithms.image.jpeg import JPEGCoder
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+# Import the project packages (core, algorithms) the way main.py does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
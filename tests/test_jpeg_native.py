@@ -0,0 +1,38 @@
+# tests/test_jpeg_native.py
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from algorithms.image.jpeg_native import BaselineJPEGEncoder, decode_baseline, encode_baseline
+
+def noisy_image(height: int = 120, width: int = 160, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    image = np.stack([(x * 1.6) % 256, np.sin(x / 9 + y / 13) * 100 + 128, (y * 2.0) % 256], axis=-1)
+    return np.clip(image + rng.normal(0, 25, image.shape), 0, 255).astype(np.uint8)
+
+@pytest.mark.parametrize('subsampling', ['4:4:4', '4:2:2', '4:2:0'])
+def test_decode_matches_pillow(subsampling):
+    encoded = encode_baseline(noisy_image(), 85, subsampling)
+    native = decode_baseline(encoded).astype(int)
+    reference = np.asarray(Image.open(io.BytesIO(encoded))).astype(int)
+    assert np.abs(native - reference).max() <= 16
+
+def psnr(decoded: np.ndarray, original: np.ndarray) -> float:
+    return 10 * np.log10(255 ** 2 / np.mean(np.square(decoded.astype(np.float64) - original)))
+
+@pytest.mark.parametrize('subsampling', ['4:4:4', '4:2:0'])
+@pytest.mark.parametrize('target', [19.0, 21.0, 22.0])
+def test_target_psnr_is_reached(subsampling, target):
+    image = noisy_image()
+    encoder = BaselineJPEGEncoder(image, subsampling)
+    encoded, quality = encoder.encode_to_target(target_psnr=target)
+    assert quality < 100
+    assert psnr(decode_baseline(encoded), image) >= target
+    assert quality == 1 or encoder.psnr(quality - 1) < target
+
+def test_target_size_fits():
+    encoder = BaselineJPEGEncoder(noisy_image())
+    encoded, quality = encoder.encode_to_target(target_size=8000)
+    assert len(encoded) <= 8000
+    assert len(encoder.encode(quality + 1)) > 8000
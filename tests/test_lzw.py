@@ -0,0 +1,18 @@
+# tests/test_lzw.py
+import pytest
+from algorithms.text.block_parallel import BlockParallelCoder
+from algorithms.text.lzw import LZWCoder
+
+LONE_SURROGATE = '\ud800abc\udfffabcabc'
+
+@pytest.mark.parametrize('packed', [False, True])
+@pytest.mark.parametrize('policy', ['freeze', 'reset', 'lru'])
+def test_lone_surrogate_round_trip(packed, policy):
+    coder = LZWCoder(packed=packed, max_dict_size=300, policy=policy)
+    encoded, metadata = coder.encode(LONE_SURROGATE)
+    assert coder.decode(encoded, metadata) == LONE_SURROGATE
+
+def test_lone_surrogate_block_parallel():
+    coder = BlockParallelCoder("LZW", block_size=4, max_workers=1)
+    encoded, metadata = coder.encode(LONE_SURROGATE)
+    assert coder.decode(encoded, metadata) == LONE_SURROGATE
@@ -0,0 +1,22 @@
+# tests/test_pipeline.py
+import pytest
+from algorithms.text.pipeline import TransformPipelineCoder
+from algorithms.text.transforms import BurrowsWheelerTransform, MoveToFrontTransform
+
+# 64 distinct symbols, so move-to-front positions reach the digit bytes 0x30-0x39
+TEXT = ''.join(chr(0x100 + (i * 37) % 64) for i in range(5000))
+
+def test_mtf_output_contains_digits():
+    transformed, _ = BurrowsWheelerTransform().forward(TEXT)
+    positions, _ = MoveToFrontTransform().forward(transformed)
+    assert any(ord('0') <= value <= ord('9') for value in positions)
+
+@pytest.mark.parametrize('coder', ["Run Length", "Huffman", "LZW"])
+def test_round_trip(coder):
+    pipeline = TransformPipelineCoder(coder)
+    encoded, metadata = pipeline.encode(TEXT)
+    assert pipeline.decode(encoded, metadata) == TEXT
+
+def test_run_length_string_format_rejected():
+    with pytest.raises(ValueError):
+        TransformPipelineCoder("Run Length", binary=False)
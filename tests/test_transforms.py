@@ -0,0 +1,24 @@
+# tests/test_transforms.py
+import random
+import pytest
+from algorithms.text.transforms import BurrowsWheelerTransform, MoveToFrontTransform
+
+def sample(kind, n):
+    rng = random.Random(n)
+    if kind == 'runs':
+        return bytes(rng.choice(b'ab') for _ in range(n))
+    if kind == 'bytes':
+        return bytes(rng.randrange(256) for _ in range(n))
+    return ''.join(chr(rng.choice([0xD800, 0x10FFFF, 0x3000 + rng.randrange(400)])) for _ in range(n))
+
+# Lengths around the 64-row stride of the inverse BWT's LF walk
+@pytest.mark.parametrize('n', [0, 1, 63, 64, 65, 1000])
+@pytest.mark.parametrize('kind', ['runs', 'bytes', 'text'])
+@pytest.mark.parametrize('block_size', [7, 1 << 20])
+def test_round_trip(kind, n, block_size):
+    data = sample(kind, n)
+    bwt, mtf = BurrowsWheelerTransform(block_size), MoveToFrontTransform()
+    transformed, bwt_params = bwt.forward(data)
+    positions, mtf_params = mtf.forward(transformed)
+    assert mtf.inverse(positions, mtf_params) == transformed
+    assert bwt.inverse(transformed, bwt_params) == data
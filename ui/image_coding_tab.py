@@ -184,7 +184,8 @@ Mode: {'Lossless' if lossless else 'Lossy'}"""
             
             logger.info("Decompressing image")
             coder = JPEGCoder()
-            decompressed_image = coder.decode(self.encoded_data, self.current_metadata)
+            # The popup shows at most 580x480, so decode directly at a reduced scale
+            decompressed_image = coder.decode(self.encoded_data, self.current_metadata, size=(580, 480))
             
             # Show decompressed image in new window
             self.show_decompressed_image(decompressed_image)
@@ -25,7 +25,8 @@ class TextCodingTab:
         self.algorithm_var = tk.StringVar()
         self.algorithm_combo = ttk.Combobox(algo_frame, textvariable=self.algorithm_var,
                                           values=["Shannon-Fano", "Huffman", "Arithmetic", 
-                                                "Run Length Encoding", "LZW"], state="readonly")
+                                                "Run Length Encoding", "LZW", "Adaptive Huffman"],
+                                          state="readonly")
         self.algorithm_combo.pack(side=tk.LEFT, padx=5)
         self.algorithm_combo.current(0)
         
@@ -107,7 +108,7 @@ class TextCodingTab:
             encoded_data, metadata = coder.encode(text)
             self.current_metadata = metadata
             
-            # For Arithmetic coding, store the Decimal object directly
+            # For Arithmetic coding, store the encoded object (bytes or Decimal) directly
             if algorithm == "Arithmetic":
                 self.encoded_decimal = encoded_data
 
@@ -149,7 +150,7 @@ class TextCodingTab:
             if algorithm == "LZW":
                 encoded_data = list(map(int, encoded_text.split()))
             elif algorithm == "Arithmetic":
-                # Use the stored Decimal object for decoding
+                # Use the stored encoded object for decoding
                 if hasattr(self, 'encoded_decimal'):
                     encoded_data = self.encoded_decimal
                 else:
@@ -174,13 +175,15 @@ class TextCodingTab:
         from algorithms.text.arithmetic import ArithmeticCoder
         from algorithms.text.run_length import RunLengthCoder
         from algorithms.text.lzw import LZWCoder
+        from algorithms.text.adaptive_huffman import AdaptiveHuffmanCoder
         
         coders = {
             "Shannon-Fano": ShannonFanoCoder(),
             "Huffman": HuffmanCoder(),
             "Arithmetic": ArithmeticCoder(),
             "Run Length Encoding": RunLengthCoder(),
-            "LZW": LZWCoder()
+            "LZW": LZWCoder(),
+            "Adaptive Huffman": AdaptiveHuffmanCoder()
         }
         logger.debug(f"Retrieved coder for algorithm: {algorithm}")
         return coders[algorithm]